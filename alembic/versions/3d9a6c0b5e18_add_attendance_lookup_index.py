@@ -0,0 +1,25 @@
+"""add attendance lookup index
+
+Revision ID: 3d9a6c0b5e18
+Revises: 8f4b1d6e2a7c
+Create Date: 2026-10-18 11:26:04.880132
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d9a6c0b5e18'
+down_revision = '8f4b1d6e2a7c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_assistance_student_period_subject_created', 'assistance',
+                    ['student_id', 'period_id', 'subject_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assistance_student_period_subject_created', table_name='assistance')
@@ -0,0 +1,28 @@
+"""add roster pagination indexes
+
+Revision ID: 5c2e7a9d41f3
+Revises: 1a83d5bc623a
+Create Date: 2026-10-18 09:12:37.512906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e7a9d41f3'
+down_revision = '1a83d5bc623a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_persons_lastname_id', 'persons', ['lastname', 'id'], unique=False)
+    op.create_index(op.f('ix_students_person_id'), 'students', ['person_id'], unique=False)
+    op.create_index(op.f('ix_users_person_id'), 'users', ['person_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_person_id'), table_name='users')
+    op.drop_index(op.f('ix_students_person_id'), table_name='students')
+    op.drop_index('ix_persons_lastname_id', table_name='persons')
@@ -0,0 +1,80 @@
+"""add foreign key indexes
+
+Revision ID: 6a1f9c3e8b47
+Revises: e2c8a4f7d913
+Create Date: 2026-10-18 14:35:48.106372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1f9c3e8b47'
+down_revision = 'e2c8a4f7d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_persons_institution_lastname_id', 'persons', ['institution_id', 'lastname', 'id'], unique=False)
+    op.create_index(op.f('ix_periods_user_id'), 'periods', ['user_id'], unique=False)
+    op.create_index(op.f('ix_students_level_id'), 'students', ['level_id'], unique=False)
+    op.create_index(op.f('ix_students_user_id'), 'students', ['user_id'], unique=False)
+    op.create_index(op.f('ix_subjects_user_id'), 'subjects', ['user_id'], unique=False)
+    op.create_index('ix_teachers_in_sections_section_teacher', 'teachers_in_sections', ['section_id', 'teacher_id'], unique=False)
+    op.create_index(op.f('ix_teachers_in_sections_teacher_id'), 'teachers_in_sections', ['teacher_id'], unique=False)
+    op.create_index(op.f('ix_assistance_level_id'), 'assistance', ['level_id'], unique=False)
+    op.create_index(op.f('ix_assistance_period_id'), 'assistance', ['period_id'], unique=False)
+    op.create_index(op.f('ix_assistance_subject_id'), 'assistance', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_assistance_user_id'), 'assistance', ['user_id'], unique=False)
+    op.create_index(op.f('ix_attendance_summaries_period_id'), 'attendance_summaries', ['period_id'], unique=False)
+    op.create_index(op.f('ix_attendance_summaries_subject_id'), 'attendance_summaries', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_grade_summaries_period_id'), 'grade_summaries', ['period_id'], unique=False)
+    op.create_index(op.f('ix_grade_summaries_subject_id'), 'grade_summaries', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_homeworks_level_id'), 'homeworks', ['level_id'], unique=False)
+    op.create_index(op.f('ix_homeworks_period_id'), 'homeworks', ['period_id'], unique=False)
+    op.create_index(op.f('ix_homeworks_student_id'), 'homeworks', ['student_id'], unique=False)
+    op.create_index(op.f('ix_homeworks_subject_id'), 'homeworks', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_homeworks_user_id'), 'homeworks', ['user_id'], unique=False)
+    op.create_index('ix_students_in_sections_section_student', 'students_in_sections', ['section_id', 'student_id'], unique=False)
+    op.create_index(op.f('ix_students_in_sections_student_id'), 'students_in_sections', ['student_id'], unique=False)
+    op.create_index('ix_teachers_student_teacher', 'teachers', ['student_id', 'teacher_id'], unique=False)
+    op.create_index(op.f('ix_teachers_teacher_id'), 'teachers', ['teacher_id'], unique=False)
+    op.create_index(op.f('ix_tests_level_id'), 'tests', ['level_id'], unique=False)
+    op.create_index(op.f('ix_tests_period_id'), 'tests', ['period_id'], unique=False)
+    op.create_index(op.f('ix_tests_student_id'), 'tests', ['student_id'], unique=False)
+    op.create_index(op.f('ix_tests_subject_id'), 'tests', ['subject_id'], unique=False)
+    op.create_index(op.f('ix_tests_user_id'), 'tests', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tests_user_id'), table_name='tests')
+    op.drop_index(op.f('ix_tests_subject_id'), table_name='tests')
+    op.drop_index(op.f('ix_tests_student_id'), table_name='tests')
+    op.drop_index(op.f('ix_tests_period_id'), table_name='tests')
+    op.drop_index(op.f('ix_tests_level_id'), table_name='tests')
+    op.drop_index(op.f('ix_teachers_teacher_id'), table_name='teachers')
+    op.drop_index('ix_teachers_student_teacher', table_name='teachers')
+    op.drop_index(op.f('ix_students_in_sections_student_id'), table_name='students_in_sections')
+    op.drop_index('ix_students_in_sections_section_student', table_name='students_in_sections')
+    op.drop_index(op.f('ix_homeworks_user_id'), table_name='homeworks')
+    op.drop_index(op.f('ix_homeworks_subject_id'), table_name='homeworks')
+    op.drop_index(op.f('ix_homeworks_student_id'), table_name='homeworks')
+    op.drop_index(op.f('ix_homeworks_period_id'), table_name='homeworks')
+    op.drop_index(op.f('ix_homeworks_level_id'), table_name='homeworks')
+    op.drop_index(op.f('ix_grade_summaries_subject_id'), table_name='grade_summaries')
+    op.drop_index(op.f('ix_grade_summaries_period_id'), table_name='grade_summaries')
+    op.drop_index(op.f('ix_attendance_summaries_subject_id'), table_name='attendance_summaries')
+    op.drop_index(op.f('ix_attendance_summaries_period_id'), table_name='attendance_summaries')
+    op.drop_index(op.f('ix_assistance_user_id'), table_name='assistance')
+    op.drop_index(op.f('ix_assistance_subject_id'), table_name='assistance')
+    op.drop_index(op.f('ix_assistance_period_id'), table_name='assistance')
+    op.drop_index(op.f('ix_assistance_level_id'), table_name='assistance')
+    op.drop_index(op.f('ix_teachers_in_sections_teacher_id'), table_name='teachers_in_sections')
+    op.drop_index('ix_teachers_in_sections_section_teacher', table_name='teachers_in_sections')
+    op.drop_index(op.f('ix_subjects_user_id'), table_name='subjects')
+    op.drop_index(op.f('ix_students_user_id'), table_name='students')
+    op.drop_index(op.f('ix_students_level_id'), table_name='students')
+    op.drop_index(op.f('ix_periods_user_id'), table_name='periods')
+    op.drop_index('ix_persons_institution_lastname_id', table_name='persons')
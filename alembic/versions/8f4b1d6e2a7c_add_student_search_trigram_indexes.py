@@ -0,0 +1,32 @@
+"""add student search trigram indexes
+
+Revision ID: 8f4b1d6e2a7c
+Revises: 5c2e7a9d41f3
+Create Date: 2026-10-18 10:03:51.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4b1d6e2a7c'
+down_revision = '5c2e7a9d41f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_persons_firstname_trgm', 'persons', ['firstname'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'firstname': 'gin_trgm_ops'})
+    op.create_index('ix_persons_lastname_trgm', 'persons', ['lastname'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'lastname': 'gin_trgm_ops'})
+    op.create_index('ix_students_identification_trgm', 'students', ['identification'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'identification': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_students_identification_trgm', table_name='students')
+    op.drop_index('ix_persons_lastname_trgm', table_name='persons')
+    op.drop_index('ix_persons_firstname_trgm', table_name='persons')
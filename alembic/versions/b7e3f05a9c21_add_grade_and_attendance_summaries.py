@@ -0,0 +1,75 @@
+"""add grade and attendance summaries
+
+Revision ID: b7e3f05a9c21
+Revises: 3d9a6c0b5e18
+Create Date: 2026-10-18 12:41:19.307558
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f05a9c21'
+down_revision = '3d9a6c0b5e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('grade_summaries',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('subject_id', sa.UUID(), nullable=False),
+    sa.Column('period_id', sa.UUID(), nullable=False),
+    sa.Column('homework_total', sa.Double(), server_default=sa.text('0'), nullable=False),
+    sa.Column('homework_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('test_total', sa.Double(), server_default=sa.text('0'), nullable=False),
+    sa.Column('test_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['period_id'], ['periods.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id', 'subject_id', 'period_id')
+    )
+    op.create_table('attendance_summaries',
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('subject_id', sa.UUID(), nullable=False),
+    sa.Column('period_id', sa.UUID(), nullable=False),
+    sa.Column('attended', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('last_attended_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['period_id'], ['periods.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_id', 'subject_id', 'period_id')
+    )
+
+    # backfill the summaries from the grades and attendance recorded so far
+    op.execute("""
+        INSERT INTO grade_summaries (student_id, subject_id, period_id,
+                                     homework_total, homework_count, test_total, test_count)
+        SELECT student_id, subject_id, period_id,
+               sum(homework_total), sum(homework_count), sum(test_total), sum(test_count)
+        FROM (
+            SELECT student_id, subject_id, period_id,
+                   sum(average) AS homework_total, count(*) AS homework_count,
+                   0 AS test_total, 0 AS test_count
+            FROM homeworks GROUP BY student_id, subject_id, period_id
+            UNION ALL
+            SELECT student_id, subject_id, period_id,
+                   0, 0, sum(average), count(*)
+            FROM tests GROUP BY student_id, subject_id, period_id
+        ) AS grades
+        GROUP BY student_id, subject_id, period_id
+    """)
+    op.execute("""
+        INSERT INTO attendance_summaries (student_id, subject_id, period_id, attended, last_attended_at)
+        SELECT student_id, subject_id, period_id, count(*), max(created_at)
+        FROM assistance
+        GROUP BY student_id, subject_id, period_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('attendance_summaries')
+    op.drop_table('grade_summaries')
@@ -0,0 +1,30 @@
+"""add user and student timestamps
+
+Revision ID: e2c8a4f7d913
+Revises: b7e3f05a9c21
+Create Date: 2026-10-18 13:52:07.418236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c8a4f7d913'
+down_revision = 'b7e3f05a9c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('users', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.add_column('students', sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('students', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('students', 'updated_at')
+    op.drop_column('students', 'created_at')
+    op.drop_column('users', 'updated_at')
+    op.drop_column('users', 'created_at')
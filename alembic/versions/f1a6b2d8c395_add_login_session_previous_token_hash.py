@@ -0,0 +1,24 @@
+"""add login session previous token hash
+
+Revision ID: f1a6b2d8c395
+Revises: c4d7e1a2f608
+Create Date: 2026-10-18 18:41:36.207514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6b2d8c395'
+down_revision = 'c4d7e1a2f608'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('login_sessions', sa.Column('previous_token_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('login_sessions', 'previous_token_hash')
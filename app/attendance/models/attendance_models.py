@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+import uuid
+
+# create a pydantic model for a section roll call, one row is saved per present student
+class Roll_Call(BaseModel):
+    subject_id: uuid.UUID
+    level_id: uuid.UUID
+    period_id: uuid.UUID
+    student_ids: list[uuid.UUID]
+
+class Roll_Call_Response(BaseModel):
+    message: str
+    recorded: int
+
+# create a pydantic model for attendance responses
+class Attendance_Response(BaseModel):
+    id: uuid.UUID
+    student_id: uuid.UUID
+    subject_id: uuid.UUID
+    level_id: uuid.UUID
+    period_id: uuid.UUID
+    user_id: uuid.UUID
+    created_at: datetime
+    class Config:
+        orm_mode = True
+
+# create a pydantic model for the attendance summaries
+class Attendance_Summary_Response(BaseModel):
+    student_id: uuid.UUID
+    subject_id: uuid.UUID
+    period_id: uuid.UUID
+    attended: int
+    last_attended_at: Optional[datetime] = None
+    class Config:
+        orm_mode = True
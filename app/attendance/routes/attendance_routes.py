@@ -0,0 +1,105 @@
+from fastapi import APIRouter, status, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+from typing import Optional
+from app.attendance.models.attendance_models import Roll_Call, Roll_Call_Response, Attendance_Response, Attendance_Summary_Response
+from app.database.database import get_db, get_read_db
+from app.schemas.schemas import Assistance_Schema, Attendance_Summary_Schema
+from app.middleware import oauth2
+from app.database.tenancy import students_out_of_scope
+from app.utils.summaries import add_attendance_to_summary
+from app.utils.bulk_insert import insert_rows
+
+# create an instance of the APIRouter class
+router = APIRouter(
+    prefix="/api/v1/attendance",
+    tags=["Attendance"],
+    responses={404: {"description": "Not found"}}
+)
+
+# largest number of students accepted by a single roll call
+MAX_ROLL_CALL_STUDENTS = 2000
+
+# define a route to record the attendance of a whole section at once
+@router.post("/roll-call", response_description="Record a section roll call", response_model=Roll_Call_Response,
+             status_code=status.HTTP_201_CREATED)
+async def create_roll_call(roll_call: Roll_Call, db: AsyncSession = Depends(get_db),
+                           current_user: int = Depends(oauth2.get_current_user)):
+    if (not current_user.is_teacher) & (not current_user.is_admin) & (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+
+    # a student listed twice is only recorded once
+    student_ids = list(dict.fromkeys(roll_call.student_ids))
+
+    if not student_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The roll call has no students")
+
+    if len(student_ids) > MAX_ROLL_CALL_STUDENTS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A roll call can not have more than {MAX_ROLL_CALL_STUDENTS} students")
+
+    # students of another institution are refused like unknown ones
+    if await students_out_of_scope(db, student_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The roll call references a student, subject, level or period that does not exist")
+
+    rows = [{
+        "student_id": student_id,
+        "subject_id": roll_call.subject_id,
+        "level_id": roll_call.level_id,
+        "period_id": roll_call.period_id,
+        "user_id": current_user.id,
+    } for student_id in student_ids]
+
+    # a single multi-row insert for the whole section
+    try:
+        await insert_rows(db, Assistance_Schema, rows)
+        await add_attendance_to_summary(db, rows)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The roll call references a student, subject, level or period that does not exist")
+
+    return {"message": "Roll call recorded successfully", "recorded": len(rows)}
+
+
+# define a route to get the attendance of a student
+@router.get("/students/{student_id}", response_description="Get the attendance of a student",
+            response_model=list[Attendance_Response], status_code=status.HTTP_200_OK)
+async def get_student_attendance(student_id: uuid.UUID, period_id: Optional[uuid.UUID] = None,
+                                 subject_id: Optional[uuid.UUID] = None, db: AsyncSession = Depends(get_read_db),
+                                 current_user: int = Depends(oauth2.get_current_user),
+                                 limit: int = 100, skip: int = 0):
+    # the filters follow the (student_id, period_id, subject_id, created_at) index
+    query = select(Assistance_Schema).filter(Assistance_Schema.student_id == student_id)
+
+    if period_id:
+        query = query.filter(Assistance_Schema.period_id == period_id)
+
+    if subject_id:
+        query = query.filter(Assistance_Schema.subject_id == subject_id)
+
+    result = await db.execute(query.order_by(Assistance_Schema.created_at.desc()).limit(limit).offset(skip))
+
+    return result.scalars().all()
+
+
+# define a route to get how many classes a student attended per subject and period
+@router.get("/students/{student_id}/summary", response_description="Get the attendance summary of a student",
+            response_model=list[Attendance_Summary_Response], status_code=status.HTTP_200_OK)
+async def get_student_attendance_summary(student_id: uuid.UUID, period_id: Optional[uuid.UUID] = None,
+                                         db: AsyncSession = Depends(get_read_db),
+                                         current_user: int = Depends(oauth2.get_current_user)):
+    query = select(Attendance_Summary_Schema).filter(Attendance_Summary_Schema.student_id == student_id)
+
+    if period_id:
+        query = query.filter(Attendance_Summary_Schema.period_id == period_id)
+
+    result = await db.execute(query)
+
+    return result.scalars().all()
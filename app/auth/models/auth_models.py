@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 import uuid
+from typing import Optional
 from app.users.models.users_models import User_Login
 
 # creating a model for the login
@@ -7,12 +8,34 @@ class Login(BaseModel):
     username: str
     password: str
 
-# create a model for the token
+# create a model for the authenticated user cached between requests
+class Current_User(BaseModel):
+    id: uuid.UUID
+    is_admin: Optional[bool] = False
+    is_superuser: Optional[bool] = False
+    is_teacher: Optional[bool] = False
+    person_id: uuid.UUID
+    institution_id: uuid.UUID
+
+# create a model for the token, principal is set when the token carries the user's roles
 class TokenData(BaseModel):
     id: uuid.UUID
+    session_id: Optional[uuid.UUID] = None
+    principal: Optional[Current_User] = None
 
 # create a model for the login response
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     user: User_Login
+    token_type: str
+
+# create a model for the refresh and logout requests
+class Refresh_Token(BaseModel):
+    refresh_token: str
+
+# create a model for the refresh response
+class Token_Response(BaseModel):
+    access_token: str
+    refresh_token: str
     token_type: str
\ No newline at end of file
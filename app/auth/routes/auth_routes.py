@@ -1,10 +1,16 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
+import math
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
-from app.auth.models.auth_models import LoginResponse
+from app.auth.models.auth_models import LoginResponse, Refresh_Token, Token_Response
 from app.database.database import get_db
-from app.schemas.schemas import User_Schema, Person_Schema
-from app.utils.jwt_token import verify
+from app.schemas.schemas import User_Schema
+from app.utils.jwt_token import verify_async
+from app.utils.rate_limit import login_limiter, client_ip
+from app.utils.login_sessions import create_session, rotate_session, revoke_session
+from app.config.configs import settings
 from app.middleware import oauth2
 
 # create an instance of the APIRouter class
@@ -16,14 +22,23 @@ router = APIRouter(
 
 # function to login a user
 @router.post("/", response_description="Login a user", response_model=LoginResponse, status_code=status.HTTP_202_ACCEPTED)
-async def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User_Schema).join(Person_Schema, User_Schema.person_id == Person_Schema.id, isouter=True
-                                    ).filter(User_Schema.email == user_credentials.username).first()
+async def login(request: Request, user_credentials: OAuth2PasswordRequestForm = Depends(),
+                db: AsyncSession = Depends(get_db)):
+    # shed bursts before any query or password verification
+    retry_after = await login_limiter.check(client_ip(request), user_credentials.username)
+    if retry_after is not None:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail="Too many login attempts, try again later",
+                            headers={"Retry-After": str(math.ceil(retry_after))})
+
+    result = await db.execute(select(User_Schema).options(joinedload(User_Schema.person)
+                                    ).filter(User_Schema.email == user_credentials.username))
+    user = result.scalars().first()
 
     if not user:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Invalid email")
     
-    if not verify(user_credentials.password, user.password):
+    if not await verify_async(user_credentials.password, user.password):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Invalid password")
     
     # create a response object
@@ -37,7 +52,49 @@ async def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Ses
         "is_teacher": user.is_teacher
     }
     
+    # open a session for the device, its refresh token replaces the next logins
+    session_id, refresh_token = await create_session(db, user.id, oauth2.revoked_sessions.window)
+    await db.commit()
+
     #create a token
-    access_token = oauth2.create_access_token(data={"user_id": str(user.id)})
+    access_token = oauth2.create_access_token(data={"user_id": str(user.id), "sid": str(session_id),
+                                                    **oauth2.principal_claims(user)})
+
+    return {"access_token": access_token, "refresh_token": refresh_token, "user": user_response,
+            "token_type": "bearer"}
+
+
+# define a route to get a new access token with a refresh token, the refresh
+# token is replaced by a new one on every call
+@router.post("/refresh", response_description="Refresh an access token", response_model=Token_Response,
+             status_code=status.HTTP_200_OK)
+async def refresh(token: Refresh_Token, db: AsyncSession = Depends(get_db)):
+    session = await rotate_session(db, token.refresh_token, oauth2.revoked_sessions)
+    await db.commit()
+
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    session_id, user_id, refresh_token = session
+    claims = {}
+
+    # the roles are only read when the access tokens carry them
+    if settings.token_principal_claims:
+        result = await db.execute(select(User_Schema).options(joinedload(User_Schema.person)
+                                        ).filter(User_Schema.id == user_id))
+        claims = oauth2.principal_claims(result.scalars().first())
+
+    access_token = oauth2.create_access_token(data={"user_id": str(user_id), "sid": str(session_id), **claims})
+
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# define a route to log a device out, its refresh token and access tokens stop working
+@router.post("/logout", response_description="Logout a device", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: Refresh_Token, db: AsyncSession = Depends(get_db)):
+    if not await revoke_session(db, token.refresh_token, oauth2.revoked_sessions):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    await db.commit()
 
-    return {"access_token": access_token, "user": user_response, "token_type": "bearer"}
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pydantic import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     database_hostname: str
@@ -8,6 +9,54 @@ class Settings(BaseSettings):
     database_username: str
     secret_key: str
     algorithm: str
+    # connection pool, sized per worker process
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: int = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    # milliseconds, 0 disables the timeout
+    database_statement_timeout: int = 0
+    # read replicas as "host" or "host:port", e.g. '["replica-1", "replica-2:5433"]',
+    # a replica that fails is retried after database_replica_retry_after seconds
+    database_replica_hosts: list[str] = []
+    database_replica_retry_after: int = 10
+    # authenticated users kept in memory, ttl in seconds
+    principal_cache_size: int = 4096
+    principal_cache_ttl: int = 60
+    # verified access tokens kept in memory until they expire
+    token_cache_size: int = 4096
+    # put the roles and institution in the access tokens so requests skip the
+    # database, role changes then only apply to tokens issued afterwards
+    token_principal_claims: bool = False
+    # refresh tokens, a device logs in again once its session expires, revoked
+    # sessions are reloaded by every worker every revoked_sessions_reload seconds
+    refresh_token_expire_hours: int = 24
+    # seconds a replaced refresh token is refused without revoking its session,
+    # e.g. when a device sends two refreshes at once
+    refresh_token_reuse_interval: int = 10
+    revoked_sessions_reload: int = 10
+    # bcrypt pool, "thread" or "process", 0 uses one worker per cpu
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 0
+    # 0 limits concurrent hashes to the number of workers
+    password_hash_max_concurrency: int = 0
+    # login token buckets, a burst then a refill per minute, a burst or refill of
+    # 0 turns a limit off, a redis url shares them between workers, 0 pending
+    # sheds past 4 times the hash concurrency, the per ip limit is off by default
+    # since a whole school behind one NAT address logs in from a single ip
+    login_ip_burst: int = 0
+    login_ip_per_minute: float = 60
+    login_account_burst: int = 5
+    login_account_per_minute: float = 2
+    login_rate_limit_url: Optional[str] = None
+    login_max_pending: int = 0
+    # proxies whose X-Forwarded-For gives the client ip, as addresses or
+    # networks, e.g. '["127.0.0.1", "10.0.0.0/8"]'
+    login_trusted_proxies: list[str] = []
+    # lookup collections cache, a redis url shares it between workers
+    reference_cache_ttl: int = 300
+    reference_cache_url: Optional[str] = None
 
     class Config:
         env_file = ".env"
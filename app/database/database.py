@@ -1,20 +1,69 @@
-from sqlalchemy import create_engine
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from ..config.configs import settings
+from .pool_stats import TimedQueuePool
+from .query_stats import instrument_engine
+from .replicas import ReplicaRouter, RoutingSession, use_replica
 
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}"
+def database_url(hostname: str, port: int):
+    return f"postgresql+asyncpg://{settings.database_username}:{settings.database_password}@{hostname}:{port}/{settings.database_name}"
+
+
+SQLALCHEMY_DATABASE_URL = database_url(settings.database_hostname, settings.database_port)
+
+# server side settings applied to every new connection
+connect_args = {}
+if settings.database_statement_timeout:
+    connect_args["server_settings"] = {"statement_timeout": str(settings.database_statement_timeout)}
+
+def create_engine(url: str):
+    new_engine = create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+    instrument_engine(new_engine.sync_engine)
+    return new_engine
+
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# each replica has its own pool with the same settings as the primary
+replica_engines = {}
+for replica_host in settings.database_replica_hosts:
+    replica_hostname, _, replica_port = replica_host.partition(":")
+    replica_engines[replica_host] = create_engine(database_url(replica_hostname, replica_port or settings.database_port))
+
+replica_router = ReplicaRouter(replica_engines, settings.database_replica_retry_after)
+
+
+# the pool stats of the primary and of every replica
+def pool_snapshots():
+    engines = {"primary": engine, **replica_engines}
+    return {name: pool_engine.pool.snapshot() for name, pool_engine in engines.items()}
+
+# expire_on_commit is disabled so committed objects can still be read
+# without an implicit (and in async, forbidden) lazy refresh
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, sync_session_class=RoutingSession,
+                                  autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+# the request's session with its selects sent to a replica, for the listing and
+# reporting routes that do not need to read their own writes
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    use_replica(db, replica_router)
+    return db
@@ -0,0 +1,80 @@
+import time
+import threading
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# upper bounds (in seconds) of the checkout wait time histogram buckets
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+# collects how long requests wait for a pooled connection
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.wait_time_buckets = [0] * (len(WAIT_TIME_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        # the last bucket counts every wait above the largest bound
+        index = len(WAIT_TIME_BUCKETS)
+        for i, bound in enumerate(WAIT_TIME_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            self.wait_time_buckets[index] += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(WAIT_TIME_BUCKETS + ("+Inf",), self.wait_time_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+
+            return {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_max": self.wait_time_max,
+                "wait_time_buckets": buckets,
+            }
+
+
+# queue pool that times every checkout, including the ones that time out, each
+# pool keeps its own stats so the primary and every replica are told apart
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def snapshot(self):
+        return self.stats.snapshot(self)
@@ -0,0 +1,94 @@
+import time
+import threading
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+# longest statement text kept for the slowest query of a route
+MAX_STATEMENT_LENGTH = 300
+
+
+# queries issued while serving a single request
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_time += seconds
+        if seconds > self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+
+
+# the stats of the request being served, the async session runs its queries in
+# a greenlet that shares the request's context so the hooks below can see it
+current_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_request_stats", default=None)
+
+
+# totals per route since the worker started
+class RouteStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route: str, stats: RequestQueryStats, handler_time: float):
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_time": 0.0,
+                    "handler_time": 0.0,
+                    "slowest_time": 0.0,
+                    "slowest_statement": None,
+                }
+
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["db_time"] += stats.total_time
+            entry["handler_time"] += handler_time
+            if stats.slowest_time > entry["slowest_time"]:
+                entry["slowest_time"] = stats.slowest_time
+                entry["slowest_statement"] = stats.slowest_statement[:MAX_STATEMENT_LENGTH]
+
+    def snapshot(self):
+        with self._lock:
+            return {route: dict(entry) for route, entry in self.routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+
+route_stats = RouteStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+# failed statements never reach after_cursor_execute
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_start_time"):
+        context.connection.info["query_start_time"].pop()
+
+
+# time every statement run on the engine
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,79 @@
+import time
+import itertools
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+# session info key of the replica a session reads from
+REPLICA = "replica"
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.down_until
+
+
+# round-robin over the replicas that are up, a replica that fails to connect or
+# drops its connection is skipped until retry_after seconds have passed
+class ReplicaRouter:
+    def __init__(self, engines: dict[str, AsyncEngine], retry_after: int):
+        self.retry_after = retry_after
+        self.replicas = [Replica(name, engine) for name, engine in engines.items()]
+        self._turn = itertools.count()
+
+        for replica in self.replicas:
+            event.listen(replica.engine.sync_engine, "handle_error", partial(self._handle_error, replica))
+
+    def _handle_error(self, replica: Replica, context):
+        if context.is_disconnect or context.connection is None:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_after
+
+    # the next healthy replica, None when every replica is down or none is configured
+    def choose(self):
+        if not self.replicas:
+            return None
+
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+
+        return None
+
+    def stats(self):
+        return [{
+            "name": replica.name,
+            "healthy": replica.healthy,
+            "reads": replica.reads,
+            "failures": replica.failures,
+        } for replica in self.replicas]
+
+
+# sends the selects of a session marked by use_replica to its replica, flushes
+# and every other statement stay on the primary
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get(REPLICA)
+        if replica is not None and not self._flushing and getattr(clause, "is_select", False):
+            return replica.engine.sync_engine
+
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+# read the rest of the session from a replica, the primary is used when none is up
+def use_replica(db: AsyncSession, router: ReplicaRouter):
+    replica = router.choose()
+    if replica is not None:
+        db.info[REPLICA] = replica
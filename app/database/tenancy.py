@@ -0,0 +1,78 @@
+import uuid
+from fastapi import status, HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.schemas import (Person_Schema, User_Schema, Student_Schema, Teacher_Schema,
+                                 Student_In_Section_Schema, Assistance_Schema, Attendance_Summary_Schema,
+                                 Homework_Schema, Test_Schema, Grade_Summary_Schema)
+from app.utils.batch import id_in
+
+# session info key of the institution a session is scoped to
+INSTITUTION_SCOPE = "institution_id"
+
+# execution option of the queries that must see every institution, e.g. the
+# checks of the columns that are unique across institutions
+SKIP_INSTITUTION_SCOPE = "skip_institution_scope"
+
+
+# scope every later select of the session to the rows of one institution
+def scope_session(db: AsyncSession, institution_id: uuid.UUID):
+    db.info[INSTITUTION_SCOPE] = institution_id
+
+
+# the criteria select from the tables, an ORM select would be scoped again by
+# the listener below and repeat the criteria inside the criteria
+persons = Person_Schema.__table__
+students = Student_Schema.__table__
+
+# tables keyed by student, scoped through the student
+student_keyed_schemas = (Teacher_Schema, Student_In_Section_Schema, Assistance_Schema, Attendance_Summary_Schema,
+                         Homework_Schema, Test_Schema, Grade_Summary_Schema)
+
+
+# the ids of the students that are not in the session's institution or do not
+# exist, inserts are not scoped so the writes keyed by student check them first
+async def students_out_of_scope(db: AsyncSession, student_ids: list[uuid.UUID]):
+    result = await db.execute(select(Student_Schema.id).filter(id_in(Student_Schema.id, student_ids)))
+    found = {str(student_id) for student_id in result.scalars().all()}
+
+    return [student_id for student_id in student_ids if str(student_id) not in found]
+
+
+# writes may only put rows in the user's own institution, inserts and updates
+# are not scoped so the routes that take an institution id check it here
+def check_own_institution(current_user, institution_id):
+    if institution_id is not None and str(institution_id) != str(current_user.institution_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You can only manage your own institution")
+
+
+# persons carry the institution, users and students are scoped through their
+# person and the tables keyed by student through the student
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_institution(orm_execute_state):
+    institution_id = orm_execute_state.session.info.get(INSTITUTION_SCOPE)
+
+    if (institution_id is None
+            or not orm_execute_state.is_select
+            or orm_execute_state.is_column_load
+            or orm_execute_state.is_relationship_load
+            or orm_execute_state.execution_options.get(SKIP_INSTITUTION_SCOPE, False)):
+        return
+
+    orm_execute_state.statement = orm_execute_state.statement.options(
+        with_loader_criteria(Person_Schema, lambda cls: cls.institution_id == institution_id,
+                             include_aliases=True),
+        with_loader_criteria(User_Schema, lambda cls: cls.person_id.in_(
+                                select(persons.c.id).filter(persons.c.institution_id == institution_id)),
+                             include_aliases=True),
+        with_loader_criteria(Student_Schema, lambda cls: cls.person_id.in_(
+                                select(persons.c.id).filter(persons.c.institution_id == institution_id)),
+                             include_aliases=True),
+        *(with_loader_criteria(schema, lambda cls: cls.student_id.in_(
+                                select(students.c.id).join(persons, persons.c.id == students.c.person_id
+                                                    ).filter(persons.c.institution_id == institution_id)),
+                               include_aliases=True)
+          for schema in student_keyed_schemas),
+    )
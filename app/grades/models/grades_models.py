@@ -0,0 +1,56 @@
+from pydantic import BaseModel
+from typing import Optional
+from enum import Enum
+import uuid
+
+# the kinds of grades kept in the gradebook
+class Grade_Kind(str, Enum):
+    homeworks = "homeworks"
+    tests = "tests"
+
+# create a pydantic model for a single grade
+class Grade_Create(BaseModel):
+    title: str
+    average: float
+    observations: Optional[str] = None
+    subject_id: uuid.UUID
+    student_id: uuid.UUID
+    level_id: uuid.UUID
+    period_id: uuid.UUID
+
+class Grade_Response(Grade_Create):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    class Config:
+        orm_mode = True
+
+# create pydantic models for the grades of a whole section
+class Student_Grade(BaseModel):
+    student_id: uuid.UUID
+    average: float
+    observations: Optional[str] = None
+
+class Grade_Batch(BaseModel):
+    title: str
+    subject_id: uuid.UUID
+    level_id: uuid.UUID
+    period_id: uuid.UUID
+    grades: list[Student_Grade]
+
+class Grade_Batch_Response(BaseModel):
+    message: str
+    recorded: int
+
+# create pydantic models for the report cards
+class Subject_Average(BaseModel):
+    subject_id: uuid.UUID
+    subject_name: str
+    period_id: uuid.UUID
+    homework_average: Optional[float] = None
+    test_average: Optional[float] = None
+    average: Optional[float] = None
+
+class Report_Card(BaseModel):
+    student_id: uuid.UUID
+    student_name: str
+    subjects: list[Subject_Average]
@@ -0,0 +1,197 @@
+from fastapi import APIRouter, status, HTTPException, Depends
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+from typing import Optional
+from app.grades.models.grades_models import (Grade_Kind, Grade_Create, Grade_Response, Grade_Batch,
+                                             Grade_Batch_Response, Report_Card)
+from app.database.database import get_db, get_read_db
+from app.schemas.schemas import (Homework_Schema, Test_Schema, Subject_Schema, Student_Schema, Person_Schema,
+                                 Student_In_Section_Schema, Grade_Summary_Schema)
+from app.middleware import oauth2
+from app.database.tenancy import students_out_of_scope
+from app.utils.summaries import add_grades_to_summary
+from app.utils.bulk_insert import insert_rows
+
+# create an instance of the APIRouter class
+router = APIRouter(
+    prefix="/api/v1/grades",
+    tags=["Grades"],
+    responses={404: {"description": "Not found"}}
+)
+
+# largest number of grades accepted by a single batch
+MAX_GRADE_BATCH = 2000
+
+# table of each kind of grade
+grade_schemas = {
+    Grade_Kind.homeworks: Homework_Schema,
+    Grade_Kind.tests: Test_Schema,
+}
+
+# column prefix of each kind of grade in the grade summaries
+summary_kinds = {
+    Grade_Kind.homeworks: "homework",
+    Grade_Kind.tests: "test",
+}
+
+
+# average of the homeworks and the tests per student, subject and period, read
+# from the running totals instead of aggregating every grade
+def grade_averages():
+    summary = Grade_Summary_Schema
+    return select(summary.student_id, summary.subject_id, summary.period_id,
+                  (summary.homework_total / func.nullif(summary.homework_count, 0)).label("homework_average"),
+                  (summary.test_total / func.nullif(summary.test_count, 0)).label("test_average"),
+                  ((summary.homework_total + summary.test_total)
+                   / func.nullif(summary.homework_count + summary.test_count, 0)).label("average")
+                  ).subquery()
+
+
+# report cards of the students matching the conditions, built from a single query
+async def get_report_cards(db: AsyncSession, averages, *conditions):
+    result = await db.execute(select(averages, Subject_Schema.name.label("subject_name"),
+                                     Person_Schema.firstname, Person_Schema.lastname
+                        ).join(Subject_Schema, Subject_Schema.id == averages.c.subject_id
+                        ).join(Student_Schema, Student_Schema.id == averages.c.student_id
+                        ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                        ).filter(*conditions
+                        ).order_by(Person_Schema.lastname, Person_Schema.firstname, averages.c.student_id,
+                                   Subject_Schema.name))
+
+    report_cards = {}
+
+    for row in result.all():
+        report_card = report_cards.get(row.student_id)
+        if report_card is None:
+            report_card = report_cards[row.student_id] = {
+                "student_id": row.student_id,
+                "student_name": f"{row.firstname} {row.lastname}",
+                "subjects": [],
+            }
+
+        report_card["subjects"].append({
+            "subject_id": row.subject_id,
+            "subject_name": row.subject_name,
+            "period_id": row.period_id,
+            "homework_average": row.homework_average,
+            "test_average": row.test_average,
+            "average": row.average,
+        })
+
+    return list(report_cards.values())
+
+
+# define a route to save a single homework or test grade
+@router.post("/{kind}", response_description="Save a grade", response_model=Grade_Response,
+             status_code=status.HTTP_201_CREATED)
+async def create_grade(kind: Grade_Kind, grade: Grade_Create, db: AsyncSession = Depends(get_db),
+                       current_user: int = Depends(oauth2.get_current_user)):
+    if (not current_user.is_teacher) & (not current_user.is_admin) & (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+
+    # students of another institution are refused like unknown ones
+    if await students_out_of_scope(db, [grade.student_id]):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The grade references a student, subject, level or period that does not exist")
+
+    new_grade = grade_schemas[kind](**grade.dict(), user_id=current_user.id)
+    db.add(new_grade)
+
+    try:
+        await add_grades_to_summary(db, summary_kinds[kind], [grade.dict()])
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The grade references a student, subject, level or period that does not exist")
+
+    return new_grade
+
+
+# define a route to save the grades of a whole section for one homework or test
+@router.post("/{kind}/batch", response_description="Save the grades of a section",
+             response_model=Grade_Batch_Response, status_code=status.HTTP_201_CREATED)
+async def create_grade_batch(kind: Grade_Kind, batch: Grade_Batch, db: AsyncSession = Depends(get_db),
+                             current_user: int = Depends(oauth2.get_current_user)):
+    if (not current_user.is_teacher) & (not current_user.is_admin) & (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+
+    if not batch.grades:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The batch has no grades")
+
+    if len(batch.grades) > MAX_GRADE_BATCH:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A batch can not have more than {MAX_GRADE_BATCH} grades")
+
+    # students of another institution are refused like unknown ones
+    if await students_out_of_scope(db, list(dict.fromkeys(grade.student_id for grade in batch.grades))):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The batch references a student, subject, level or period that does not exist")
+
+    rows = [{
+        "title": batch.title,
+        "average": grade.average,
+        "observations": grade.observations,
+        "student_id": grade.student_id,
+        "subject_id": batch.subject_id,
+        "level_id": batch.level_id,
+        "period_id": batch.period_id,
+        "user_id": current_user.id,
+    } for grade in batch.grades]
+
+    # a single multi-row insert for the whole section
+    try:
+        await insert_rows(db, grade_schemas[kind], rows)
+        await add_grades_to_summary(db, summary_kinds[kind], rows)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The batch references a student, subject, level or period that does not exist")
+
+    return {"message": "Grades saved successfully", "recorded": len(rows)}
+
+
+# define a route to get the report card of a student
+@router.get("/students/{student_id}/report", response_description="Get the report card of a student",
+            response_model=Report_Card, status_code=status.HTTP_200_OK)
+async def get_student_report(student_id: uuid.UUID, period_id: Optional[uuid.UUID] = None,
+                             db: AsyncSession = Depends(get_read_db),
+                             current_user: int = Depends(oauth2.get_current_user)):
+    averages = grade_averages()
+    conditions = [averages.c.student_id == student_id]
+
+    if period_id:
+        conditions.append(averages.c.period_id == period_id)
+
+    report_cards = await get_report_cards(db, averages, *conditions)
+
+    if not report_cards:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"No grades found for student {student_id}")
+
+    return report_cards[0]
+
+
+# define a route to get the report cards of every student in a section for a period
+@router.get("/sections/{section_id}/report", response_description="Get the report cards of a section",
+            response_model=list[Report_Card], status_code=status.HTTP_200_OK)
+async def get_section_report(section_id: uuid.UUID, period_id: uuid.UUID, db: AsyncSession = Depends(get_read_db),
+                             current_user: int = Depends(oauth2.get_current_user)):
+    averages = grade_averages()
+    section_students = select(Student_In_Section_Schema.student_id).filter(
+                            Student_In_Section_Schema.section_id == section_id)
+
+    report_cards = await get_report_cards(db, averages, averages.c.student_id.in_(section_students),
+                                          averages.c.period_id == period_id)
+
+    if not report_cards:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"No grades found for section {section_id}")
+
+    return report_cards
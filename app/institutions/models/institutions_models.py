@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 import uuid
+from enum import Enum
 
 # create a pydantic model for create institution
 class Institution_Base(BaseModel):
@@ -8,4 +9,9 @@ class Institution_Base(BaseModel):
 class Institution_Response(Institution_Base):
     id: uuid.UUID
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# the formats of the roster exports
+class Export_Format(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
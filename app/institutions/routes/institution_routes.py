@@ -1,9 +1,14 @@
 from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.institutions.models.institutions_models import Institution_Base, Institution_Response
-from app.database.database import get_db
-from app.schemas.schemas import Institution_Schema
+import uuid
+from app.institutions.models.institutions_models import Institution_Base, Institution_Response, Export_Format
+from app.database.database import get_db, get_read_db
+from app.schemas.schemas import (Institution_Schema, Person_Schema, Student_Schema, User_Schema, Section_Schema,
+                                 Student_In_Section_Schema)
+from app.middleware import oauth2
+from app.utils.export import export_response
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -15,8 +20,9 @@ router = APIRouter(
 # define a route to create a new institution
 @router.post("/", response_description="Create a new institution", response_model=Institution_Response, 
                 status_code=status.HTTP_201_CREATED)
-def create_institution(institution: Institution_Base, db: Session = Depends(get_db)):
-    institution_exists =  db.query(Institution_Schema).filter(Institution_Schema.name == institution.name).first()
+async def create_institution(institution: Institution_Base, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Institution_Schema).filter(Institution_Schema.name == institution.name))
+    institution_exists = result.scalars().first()
 
     if institution_exists:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, 
@@ -24,15 +30,15 @@ def create_institution(institution: Institution_Base, db: Session = Depends(get_
     
     new_institution = Institution_Schema(**institution.dict())
     db.add(new_institution)
-    db.commit()
-    db.refresh(new_institution)
+    await db.commit()
     return new_institution
 
 # define a route to get all institutions
 @router.get("/", response_description="Get all institutions", response_model=list[Institution_Response],
             status_code=status.HTTP_200_OK)
-def get_all_institutions(db: Session = Depends(get_db), search: Optional[str] = ""):
-    institutions = db.query(Institution_Schema).filter(Institution_Schema.name.like(f"%{search}%")).all()
+async def get_all_institutions(db: AsyncSession = Depends(get_read_db), search: Optional[str] = ""):
+    result = await db.execute(select(Institution_Schema).filter(Institution_Schema.name.like(f"%{search}%")))
+    institutions = result.scalars().all()
 
     # if institutions is None, return an HTTPException
     if institutions == []:
@@ -44,12 +50,75 @@ def get_all_institutions(db: Session = Depends(get_db), search: Optional[str] =
 # define a route to get a single institution by id
 @router.get("/{id}", response_description="Get a single institution by id", response_model=Institution_Response,
             status_code=status.HTTP_200_OK)
-async def get_institution_by_id(id: int, db: Session = Depends(get_db)):
-    institution = db.query(Institution_Schema).filter(Institution_Schema.id == id).first()
+async def get_institution_by_id(id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Institution_Schema).filter(Institution_Schema.id == id))
+    institution = result.scalars().first()
 
     # if institution is None, return an HTTPException
     if institution is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail=f"Institution with id {id} not found")
     
-    return institution
\ No newline at end of file
+    return institution
+
+
+# the admin exporting the institution of the path
+async def get_exporting_user(id: uuid.UUID, current_user: int = Depends(oauth2.get_current_user)):
+    if (not current_user.is_admin) | (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You do not have permission to perform this action")
+
+    # the export runs in its own session, so it is scoped here
+    if id != current_user.institution_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You can only export your own institution")
+
+    return current_user
+
+
+# define a route to export the students of an institution
+@router.get("/{id}/export/students", response_description="Export the students of an institution",
+            status_code=status.HTTP_200_OK)
+async def export_students(id: uuid.UUID, format: Export_Format = Export_Format.csv,
+                          current_user: int = Depends(get_exporting_user)):
+    statement = select(Student_Schema.id, Student_Schema.identification, Person_Schema.firstname,
+                       Person_Schema.lastname, Person_Schema.phone, Person_Schema.address, Student_Schema.contact,
+                       Student_Schema.level_id, Student_Schema.observations
+                    ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                    ).filter(Person_Schema.institution_id == id
+                    ).order_by(Person_Schema.lastname, Person_Schema.id)
+
+    return export_response(statement, format.value, "students")
+
+
+# define a route to export the users of an institution
+@router.get("/{id}/export/users", response_description="Export the users of an institution",
+            status_code=status.HTTP_200_OK)
+async def export_users(id: uuid.UUID, format: Export_Format = Export_Format.csv,
+                       current_user: int = Depends(get_exporting_user)):
+    statement = select(User_Schema.id, User_Schema.email, Person_Schema.firstname, Person_Schema.lastname,
+                       Person_Schema.phone, Person_Schema.address, User_Schema.is_admin, User_Schema.is_superuser,
+                       User_Schema.is_teacher
+                    ).join(Person_Schema, Person_Schema.id == User_Schema.person_id
+                    ).filter(Person_Schema.institution_id == id
+                    ).order_by(Person_Schema.lastname, Person_Schema.id)
+
+    return export_response(statement, format.value, "users")
+
+
+# define a route to export which section every student of an institution is in
+@router.get("/{id}/export/sections", response_description="Export the section membership of an institution",
+            status_code=status.HTTP_200_OK)
+async def export_sections(id: uuid.UUID, format: Export_Format = Export_Format.csv,
+                          current_user: int = Depends(get_exporting_user)):
+    statement = select(Section_Schema.id.label("section_id"), Section_Schema.name.label("section_name"),
+                       Student_Schema.id.label("student_id"), Student_Schema.identification,
+                       Person_Schema.firstname, Person_Schema.lastname
+                    ).select_from(Student_In_Section_Schema
+                    ).join(Section_Schema, Section_Schema.id == Student_In_Section_Schema.section_id
+                    ).join(Student_Schema, Student_Schema.id == Student_In_Section_Schema.student_id
+                    ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                    ).filter(Person_Schema.institution_id == id
+                    ).order_by(Section_Schema.name, Person_Schema.lastname, Person_Schema.id)
+
+    return export_response(statement, format.value, "sections")
@@ -8,7 +8,12 @@ from .subjects.routes import subjects_routes
 from .school_period.routes import school_period_routes
 from .rooms_class.routes import rooms_class_routes, students_in_classrooms_routes
 from .teachers.routes import teachers_routes
+from .monitoring.routes import monitoring_routes
+from .attendance.routes import attendance_routes
+from .grades.routes import grades_routes
 from fastapi.middleware.cors import CORSMiddleware
+from .utils.jwt_token import password_pool
+from .middleware.timing import QueryTimingMiddleware
 
 origins = [
     "http://localhost:3000",
@@ -30,9 +35,12 @@ app.add_middleware(
     allow_origins="*",
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"]
 )
 
+app.add_middleware(QueryTimingMiddleware)
+
 app.include_router(users_routes.router)
 app.include_router(institution_routes.router)
 app.include_router(auth_routes.router)
@@ -43,6 +51,14 @@ app.include_router(school_period_routes.router)
 app.include_router(rooms_class_routes.router)
 app.include_router(students_in_classrooms_routes.router)
 app.include_router(teachers_routes.router)
+app.include_router(monitoring_routes.router)
+app.include_router(attendance_routes.router)
+app.include_router(grades_routes.router)
+
+# stop the password hashing workers with the application
+@app.on_event("shutdown")
+async def shutdown():
+    password_pool.shutdown()
 
 # Define the root route
 @app.get("/")
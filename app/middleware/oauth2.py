@@ -1,12 +1,18 @@
-from jose import JWTError, jwt
+import time
+import hashlib
+from jose import JWTError, jwt, jwk
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from app.schemas.schemas import User_Schema
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.schemas import User_Schema, Person_Schema
 from app.database.database import get_db
+from app.database.tenancy import scope_session
 from app.config.configs import settings
-from app.auth.models.auth_models import TokenData
+from app.auth.models.auth_models import TokenData, Current_User
+from app.utils.cache import TTLCache
+from app.utils.login_sessions import RevokedSessions
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/login")
@@ -20,6 +26,22 @@ SECRET_KEY = settings.secret_key
 #algorithm
 ALGORITHM = settings.algorithm
 
+# the key is parsed once instead of on every encode and decode
+SIGNING_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+
+# claims of a token that carries the authenticated user
+PRINCIPAL_CLAIMS = ("is_admin", "is_superuser", "is_teacher", "person_id", "institution_id")
+
+# authenticated users by id, the ttl bounds how long other workers
+# can serve a user whose roles were changed elsewhere
+principal_cache = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+
+# sessions revoked while their access tokens may still be presented
+revoked_sessions = RevokedSessions(window=ACCESS_TOKEN_EXPIRE_MINUTES * 60, reload_every=settings.revoked_sessions_reload)
+
+# verified tokens by digest, each entry expires with its token
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
 
@@ -27,35 +49,84 @@ def create_access_token(data: dict):
 
     to_encode.update({"exp": expire})
 
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
 
     return encoded_jwt
 
 
+# the roles and institution of a user (loaded with its person) to put in its
+# access token, empty unless token_principal_claims is enabled
+def principal_claims(user: User_Schema):
+    if not settings.token_principal_claims:
+        return {}
+
+    return {
+        "is_admin": user.is_admin,
+        "is_superuser": user.is_superuser,
+        "is_teacher": user.is_teacher,
+        "person_id": str(user.person_id),
+        "institution_id": str(user.person.institution_id),
+    }
+
+
 def verify_access_token(token: str, credentials_exception):
+    # a token seen before is not decoded and its signature not checked again
+    digest = hashlib.blake2b(token.encode(), digest_size=32).digest()
+    token_data = token_cache.get(digest)
+
+    if token_data is not None:
+        return token_data
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
 
         id: str = payload.get("user_id")
 
         if id is None:
             raise credentials_exception
         
-        token_data = TokenData(id=id)
+        token_data = TokenData(id=id, session_id=payload.get("sid"))
+
+        if settings.token_principal_claims and all(claim in payload for claim in PRINCIPAL_CLAIMS):
+            token_data.principal = Current_User(id=id, **{claim: payload[claim] for claim in PRINCIPAL_CLAIMS})
 
     except JWTError:
         raise credentials_exception
+
+    if "exp" in payload:
+        token_cache.set(digest, token_data, ttl=payload["exp"] - time.time())
     
     return token_data
     
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                           detail=f"Could not validate credentials",
                                           headers={"WWW-Authenticate": "Bearer"})
     
     token = verify_access_token(token, credentials_exception)
 
-    user = db.query(User_Schema).filter(User_Schema.id == token.id).first()
+    # tokens of a session that was logged out or had its refresh token replayed
+    if token.session_id and await revoked_sessions.contains(db, token.session_id):
+        raise credentials_exception
+
+    user = token.principal or principal_cache.get(token.id)
+
+    if user is None:
+        result = await db.execute(select(User_Schema.id, User_Schema.is_admin, User_Schema.is_superuser,
+                                        User_Schema.is_teacher, User_Schema.person_id, Person_Schema.institution_id
+                                        ).join(Person_Schema, User_Schema.person_id == Person_Schema.id
+                                        ).filter(User_Schema.id == token.id))
+        row = result.first()
+
+        # the token may outlive its user
+        if row is None:
+            raise credentials_exception
+
+        user = Current_User(**row._mapping)
+        principal_cache.set(token.id, user)
+
+    # the rest of the request only sees the rows of the user's institution
+    scope_session(db, user.institution_id)
     
     return user
\ No newline at end of file
@@ -0,0 +1,48 @@
+import time
+from app.database.query_stats import RequestQueryStats, current_request_stats, route_stats
+
+
+# pure ASGI middleware that counts the SQL statements and time spent by each
+# request, reports them in a Server-Timing header and adds them to route_stats
+class QueryTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = {}
+
+    def _route_key(self, scope):
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+
+        # plain routes only leave their endpoint in the scope
+        if path is None and scope.get("endpoint") is not None:
+            endpoint = scope["endpoint"]
+            if endpoint not in self._route_paths:
+                self._route_paths[endpoint] = next((r.path for r in scope["app"].routes
+                                                    if getattr(r, "endpoint", None) is endpoint), None)
+            path = self._route_paths[endpoint]
+
+        return f"{scope['method']} {path or 'unmatched'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                handler_time = time.perf_counter() - start
+                server_timing = (f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries", '
+                                 f'app;dur={handler_time * 1000:.2f}')
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", server_timing.encode())]
+                route_stats.record(self._route_key(scope), stats, handler_time)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
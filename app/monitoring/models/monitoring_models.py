@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+from typing import Optional
+
+# create a pydantic model for the connection pool stats
+class Pool_Stats_Response(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_max: float
+    wait_time_buckets: dict[str, int]
+
+# create a pydantic model for the in-process cache stats
+class Cache_Stats_Response(BaseModel):
+    size: Optional[int] = None
+    maxsize: Optional[int] = None
+    hits: int
+    misses: int
+
+# create a pydantic model for the password hashing pool stats
+class Password_Pool_Stats_Response(BaseModel):
+    executor: str
+    workers: int
+    max_concurrency: int
+    in_flight: int
+    waiting: int
+    completed: int
+    wait_time_total: float
+    wait_time_max: float
+
+# create a pydantic model for the login limiter stats
+class Login_Limiter_Stats_Response(BaseModel):
+    accepted: int
+    shed_ip: int
+    shed_account: int
+    shed_busy: int
+    max_pending: int
+
+# create a pydantic model for the per route query stats
+class Route_Stats_Response(BaseModel):
+    requests: int
+    queries: int
+    max_queries: int
+    db_time: float
+    handler_time: float
+    slowest_time: float
+    slowest_statement: Optional[str] = None
+
+# create a pydantic model for the read replica stats
+class Replica_Stats_Response(BaseModel):
+    name: str
+    healthy: bool
+    reads: int
+    failures: int
@@ -0,0 +1,163 @@
+from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
+from app.monitoring.models.monitoring_models import Pool_Stats_Response, Cache_Stats_Response, Password_Pool_Stats_Response, Route_Stats_Response, Replica_Stats_Response, Login_Limiter_Stats_Response
+from app.database.database import replica_router, pool_snapshots
+from app.database.query_stats import route_stats
+from app.utils.jwt_token import password_pool
+from app.utils.rate_limit import login_limiter
+from app.utils.reference_cache import reference_cache
+from app.middleware import oauth2
+
+# create an instance of the APIRouter class
+router = APIRouter(
+    prefix="/api/v1/monitoring",
+    tags=["Monitoring"],
+    responses={404: {"description": "Not found"}}
+)
+
+# define a route to get the connection pool stats of this worker, per engine
+@router.get("/pool", response_description="Get the database connection pool stats", 
+            response_model=dict[str, Pool_Stats_Response], status_code=status.HTTP_200_OK)
+async def get_pool_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return pool_snapshots()
+
+
+# define a route to get the hit and miss counters of the in-process caches
+@router.get("/cache", response_description="Get the in-process cache stats", 
+            response_model=dict[str, Cache_Stats_Response], status_code=status.HTTP_200_OK)
+async def get_cache_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return {
+        "principal": oauth2.principal_cache.stats(),
+        "token": oauth2.token_cache.stats(),
+        "reference": reference_cache.stats(),
+    }
+
+
+# define a route to get the password hashing pool stats of this worker
+@router.get("/password-pool", response_description="Get the password hashing pool stats", 
+            response_model=Password_Pool_Stats_Response, status_code=status.HTTP_200_OK)
+async def get_password_pool_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return password_pool.stats()
+
+
+# define a route to get the accepted and shed login attempts of this worker
+@router.get("/login-limiter", response_description="Get the login rate limiter stats", 
+            response_model=Login_Limiter_Stats_Response, status_code=status.HTTP_200_OK)
+async def get_login_limiter_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return login_limiter.stats()
+
+
+# define a route to get the query count and timing totals of every route
+@router.get("/routes", response_description="Get the query stats per route", 
+            response_model=dict[str, Route_Stats_Response], status_code=status.HTTP_200_OK)
+async def get_route_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return route_stats.snapshot()
+
+
+# define a route to get the health and read counters of the read replicas
+@router.get("/replicas", response_description="Get the read replica stats", 
+            response_model=list[Replica_Stats_Response], status_code=status.HTTP_200_OK)
+async def get_replica_stats(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    return replica_router.stats()
+
+
+# escape a value used as a prometheus label
+def label(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# define a route to export the route and pool stats in the prometheus text format
+@router.get("/metrics", response_description="Get the stats in the Prometheus text format", 
+            response_class=PlainTextResponse, status_code=status.HTTP_200_OK)
+async def get_metrics(current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+    
+    lines = []
+    routes = route_stats.snapshot()
+
+    for name, field, kind, help_text in (
+        ("school_http_requests_total", "requests", "counter", "Requests served per route"),
+        ("school_db_queries_total", "queries", "counter", "SQL statements issued per route"),
+        ("school_db_query_seconds_total", "db_time", "counter", "Time spent in SQL statements per route"),
+        ("school_http_handler_seconds_total", "handler_time", "counter", "Time until the response started per route"),
+        ("school_db_queries_max", "max_queries", "gauge", "Most SQL statements issued by one request per route"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for route, entry in routes.items():
+            lines.append(f'{name}{{route="{label(route)}"}} {entry[field]}')
+
+    pools = pool_snapshots()
+
+    for name, field, help_text in (
+        ("school_db_pool_size", "size", "Configured connection pool size"),
+        ("school_db_pool_checked_out", "checked_out", "Connections currently checked out"),
+        ("school_db_pool_overflow", "overflow", "Overflow connections currently open"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for engine_name, pool in pools.items():
+            lines.append(f'{name}{{engine="{label(engine_name)}"}} {pool[field]}')
+
+    lines.append("# HELP school_db_pool_timeouts_total Connection checkouts that timed out")
+    lines.append("# TYPE school_db_pool_timeouts_total counter")
+    for engine_name, pool in pools.items():
+        lines.append(f'school_db_pool_timeouts_total{{engine="{label(engine_name)}"}} {pool["timeouts"]}')
+
+    lines.append("# HELP school_db_pool_wait_seconds Time spent waiting for a pooled connection")
+    lines.append("# TYPE school_db_pool_wait_seconds histogram")
+    for engine_name, pool in pools.items():
+        engine_label = label(engine_name)
+        for bound, count in pool["wait_time_buckets"].items():
+            lines.append(f'school_db_pool_wait_seconds_bucket{{engine="{engine_label}",le="{bound}"}} {count}')
+        lines.append(f'school_db_pool_wait_seconds_sum{{engine="{engine_label}"}} {pool["wait_time_total"]}')
+        lines.append(f'school_db_pool_wait_seconds_count{{engine="{engine_label}"}} '
+                     f'{pool["checkouts"] + pool["timeouts"]}')
+
+    limiter = login_limiter.stats()
+
+    lines.append("# HELP school_login_attempts_total Login attempts accepted or shed before hashing")
+    lines.append("# TYPE school_login_attempts_total counter")
+    for outcome in ("accepted", "shed_ip", "shed_account", "shed_busy"):
+        lines.append(f'school_login_attempts_total{{outcome="{outcome}"}} {limiter[outcome]}')
+
+    replicas = replica_router.stats()
+
+    if replicas:
+        lines.append("# HELP school_db_replica_up Whether the read replica is taking reads")
+        lines.append("# TYPE school_db_replica_up gauge")
+        for replica in replicas:
+            lines.append(f'school_db_replica_up{{replica="{label(replica["name"])}"}} {int(replica["healthy"])}')
+
+        lines.append("# HELP school_db_replica_reads_total Sessions routed to the read replica")
+        lines.append("# TYPE school_db_replica_reads_total counter")
+        for replica in replicas:
+            lines.append(f'school_db_replica_reads_total{{replica="{label(replica["name"])}"}} {replica["reads"]}')
+
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from typing import Optional
 from app.rooms_class.models.rooms_class_models import RoomBase, All_Rooms
 from app.database.database import get_db
 from app.schemas.schemas import Section_Schema, Student_In_Section_Schema, Person_Schema, Student_Schema
 from app.middleware import oauth2
+from app.utils.pagination import keyset_paginate, next_cursor, NEXT_CURSOR_HEADER
+from app.utils.reference_cache import reference_cache, search_items
+from app.utils.conditional import conditional_body, modified_at, latest, conditional_version
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -17,7 +21,7 @@ router = APIRouter(
 # define a route to create a new room
 @router.post("/", response_description="Create a new room", response_model=All_Rooms,
               status_code=status.HTTP_201_CREATED)
-async def create_room(room_class: RoomBase, db: Session = Depends(get_db),
+async def create_room(room_class: RoomBase, db: AsyncSession = Depends(get_db),
                 current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
@@ -26,61 +30,104 @@ async def create_room(room_class: RoomBase, db: Session = Depends(get_db),
     # create a new room
     new_room = Section_Schema(**room_class.dict())
     db.add(new_room)
-    db.commit()
-    db.refresh(new_room)
+    await db.commit()
+    await reference_cache.invalidate("rooms")
     return new_room
 
 
 # define a route to get all rooms
 @router.get("/", response_description="Get all rooms", response_model=list[All_Rooms],
               status_code=status.HTTP_200_OK)
-async def get_all_rooms(db: Session = Depends(get_db), search: Optional[str] = ""):
-    rooms = db.query(Section_Schema).filter(Section_Schema.name.ilike(f"%{search}%")).group_by(Section_Schema.id).distinct().all()
+async def get_all_rooms(request: Request, response: Response, db: AsyncSession = Depends(get_db),
+                        search: Optional[str] = ""):
+    # the database is only read on a cache miss, the search runs on the cached rooms
+    async def load():
+        result = await db.execute(select(Section_Schema))
+        return [All_Rooms.from_orm(room).dict() for room in result.scalars().all()]
+
+    rooms, etag = search_items(await reference_cache.get_or_load("rooms", load), search)
 
     #if no rooms found
     if not rooms:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="No rooms found")
-    return rooms
+    return conditional_body(request, response, rooms, etag)
 
 
 # define a route to get a single room
 @router.get("/{room_id}", response_description="Get a single room by id",
               status_code=status.HTTP_200_OK)
-async def get_single_room(room_id: uuid.UUID, db: Session = Depends(get_db)):
-    room = db.query(Student_In_Section_Schema).join(Section_Schema, Section_Schema.id == Student_In_Section_Schema.section_id
-                                        ).join(Student_Schema, Student_Schema.id == Student_In_Section_Schema.student_id
+async def get_single_room(room_id: uuid.UUID, request: Request, response: Response,
+                          db: AsyncSession = Depends(get_db), limit: int = 100, cursor: Optional[str] = None):
+    # read only the version of the room and of its roster first
+    roster = select(Student_In_Section_Schema).join(Student_Schema, Student_Schema.id == Student_In_Section_Schema.student_id
                                         ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
-                                        ).filter(Section_Schema.id == room_id).all()
-    
+                                        ).filter(Student_In_Section_Schema.section_id == Section_Schema.id
+                                        ).correlate(Section_Schema)
+    result = await db.execute(select(Section_Schema.name,
+                                     latest(modified_at(Section_Schema),
+                                                   roster.with_only_columns(func.max(latest(
+                                                        modified_at(Student_In_Section_Schema), modified_at(Person_Schema))))
+                                                        .scalar_subquery()
+                                                   ).label("last_modified"),
+                                     roster.with_only_columns(func.count()).scalar_subquery().label("students")
+                                     ).filter(Section_Schema.id == room_id))
+    version = result.first()
+
     # if no room found
-    if not room:
+    if (version is None) or (not version.students):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"Room with id: {room_id} not found")
-    
+
+    not_modified = conditional_version(request, response, version.last_modified, version.students)
+    if not_modified:
+        return not_modified
+
+    # the roster in a single query of only the columns of the response
+    roster_query = select(Student_In_Section_Schema.student_id, Person_Schema.id, Person_Schema.firstname,
+                          Person_Schema.lastname
+                        ).join(Student_Schema, Student_Schema.id == Student_In_Section_Schema.student_id
+                        ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                        ).filter(Student_In_Section_Schema.section_id == room_id)
+
+    # passing a cursor (empty for the first page) pages through the roster
+    if cursor is not None:
+        roster_query = keyset_paginate(roster_query, cursor, limit)
+    else:
+        roster_query = roster_query.order_by(Person_Schema.lastname, Person_Schema.id)
+
+    result = await db.execute(roster_query)
+    students = result.all()
+
+    if cursor is not None:
+        new_cursor = next_cursor(students, limit)
+        if new_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = new_cursor
+
     result = []
 
-    for i in room:
+    for student in students:
         room_data = {
-            "student_id": i.student_id,
-            "name": f"{i.student.person.firstname} {i.student.person.lastname}",
+            "student_id": student.student_id,
+            "name": f"{student.firstname} {student.lastname}",
         }
         result.append(room_data)
     
-    return {"id": room_id, "name": room[0].section.name, "students": result}
+    return {"id": room_id, "name": version.name, "students": result}
 
 
 # define a route to update a room
 @router.patch("/{room_id}", response_description="Update a room", response_model=All_Rooms,
               status_code=status.HTTP_200_OK)
-async def update_room(room_id: uuid.UUID, room_class: RoomBase, db: Session = Depends(get_db),
+async def update_room(room_id: uuid.UUID, room_class: RoomBase, db: AsyncSession = Depends(get_db),
                       current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="Only admins can update rooms")
     
     # get the room
-    room = db.query(Section_Schema).filter(Section_Schema.id == room_id).first()
+    result = await db.execute(select(Section_Schema).filter(Section_Schema.id == room_id))
+    room = result.scalars().first()
     
     # if no room found
     if not room:
@@ -90,6 +137,6 @@ async def update_room(room_id: uuid.UUID, room_class: RoomBase, db: Session = De
     # update the room
     room.name = room_class.name
 
-    db.commit()
-    db.refresh(room)
+    await db.commit()
+    await reference_cache.invalidate("rooms")
     return room
\ No newline at end of file
@@ -1,5 +1,5 @@
 from app.database.database import Base
-from sqlalchemy import Column, String, Boolean, Double
+from sqlalchemy import Column, String, Boolean, Double, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
@@ -28,6 +28,13 @@ class Person_Schema(Base):
     address = Column(String(255), nullable=True)
     institution_id = Column(UUID, ForeignKey("institutions.id", ondelete='CASCADE'), nullable=False)
     institution = relationship('Institution_Schema')
+    # sort key of the keyset paginated rosters and the name search trigram indexes
+    __table_args__ = (
+        Index("ix_persons_lastname_id", "lastname", "id"),
+        Index("ix_persons_institution_lastname_id", "institution_id", "lastname", "id"),
+        Index("ix_persons_firstname_trgm", "firstname", postgresql_using="gin", postgresql_ops={"firstname": "gin_trgm_ops"}),
+        Index("ix_persons_lastname_trgm", "lastname", postgresql_using="gin", postgresql_ops={"lastname": "gin_trgm_ops"}),
+    )
 
 # create a class for the user schema
 class User_Schema(Base):
@@ -38,8 +45,10 @@ class User_Schema(Base):
     is_admin = Column(Boolean, server_default='FALSE')
     is_superuser = Column(Boolean, server_default='FALSE')
     is_teacher = Column(Boolean, server_default='FALSE')
-    person_id = Column(UUID, ForeignKey("persons.id", ondelete='CASCADE'), nullable=False)
+    person_id = Column(UUID, ForeignKey("persons.id", ondelete='CASCADE'), nullable=False, index=True)
     person = relationship('Person_Schema')
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
 
 # create a class for the students schema
 class Student_Schema(Base):
@@ -47,13 +56,19 @@ class Student_Schema(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     identification = Column(String(255), nullable=False, unique=True)
     contact = Column(String(150), nullable=True)
-    person_id = Column(UUID, ForeignKey("persons.id", ondelete='CASCADE'), nullable=False)
+    person_id = Column(UUID, ForeignKey("persons.id", ondelete='CASCADE'), nullable=False, index=True)
     person = relationship('Person_Schema')
-    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False)
+    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False, index=True)
     level = relationship('Academic_Degree_Schema')
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
     observations = Column(String(255), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+    __table_args__ = (
+        Index("ix_students_identification_trgm", "identification", postgresql_using="gin",
+              postgresql_ops={"identification": "gin_trgm_ops"}),
+    )
 
 # create a class for the teachers in students schema
 class Teacher_Schema(Base):
@@ -61,10 +76,13 @@ class Teacher_Schema(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False)
     student = relationship('Student_Schema')
-    teacher_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    teacher_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     teacher = relationship('User_Schema')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+    __table_args__ = (
+        Index("ix_teachers_student_teacher", "student_id", "teacher_id"),
+    )
 
 # create a class for the levels schema
 class Academic_Degree_Schema(Base):
@@ -81,7 +99,7 @@ class Subject_Schema(Base):
     name = Column(String(150), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
 
 #create a class for the periods schema
@@ -91,7 +109,7 @@ class Period_Schema(Base):
     name = Column(String(150), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
 
 # create a class for the sections schema
@@ -108,10 +126,13 @@ class Student_In_Section_Schema(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     section_id = Column(UUID, ForeignKey("sections.id", ondelete='CASCADE'), nullable=False)
     section = relationship('Section_Schema')
-    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False)
+    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False, index=True)
     student = relationship('Student_Schema')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+    __table_args__ = (
+        Index("ix_students_in_sections_section_student", "section_id", "student_id"),
+    )
 
 # create a class for the teachers in sections schema
 class Teacher_In_Section_Schema(Base):
@@ -119,27 +140,33 @@ class Teacher_In_Section_Schema(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     section_id = Column(UUID, ForeignKey("sections.id", ondelete='CASCADE'), nullable=False)
     section = relationship('Section_Schema')
-    teacher_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    teacher_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     teacher = relationship('User_Schema')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+    __table_args__ = (
+        Index("ix_teachers_in_sections_section_teacher", "section_id", "teacher_id"),
+    )
 
 # create a class for the assistance schema
 class Assistance_Schema(Base):
     __tablename__ = "assistance"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
-    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False, index=True)
     subject = relationship('Subject_Schema')
     student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False)
     student = relationship('Student_Schema')
-    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False)
+    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False, index=True)
     level = relationship('Academic_Degree_Schema')
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
-    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False)
+    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False, index=True)
     period = relationship('Period_Schema')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+    __table_args__ = (
+        Index("ix_assistance_student_period_subject_created", "student_id", "period_id", "subject_id", "created_at"),
+    )
 
 # create a class for the homeworks schema
 class Homework_Schema(Base):
@@ -148,15 +175,15 @@ class Homework_Schema(Base):
     average = Column(Double, nullable=False)
     observations = Column(String(255), nullable=True)
     title = Column(String(200), nullable=False)
-    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False, index=True)
     subject = relationship('Subject_Schema')
-    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False)
+    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False, index=True)
     student = relationship('Student_Schema')
-    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False)
+    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False, index=True)
     level = relationship('Academic_Degree_Schema')
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
-    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False)
+    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False, index=True)
     period = relationship('Period_Schema')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
@@ -168,12 +195,50 @@ class Test_Schema(Base):
     average = Column(Double, nullable=False)
     observations = Column(String(255), nullable=True)
     title = Column(String(200), nullable=False)
-    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), nullable=False, index=True)
     subject = relationship('Subject_Schema')
-    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False)
+    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), nullable=False, index=True)
     student = relationship('Student_Schema')
-    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False)
+    level_id = Column(UUID, ForeignKey("levels.id", ondelete='CASCADE'), nullable=False, index=True)
     level = relationship('Academic_Degree_Schema')
-    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
+    user = relationship('User_Schema')
+    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False, index=True)
+
+# create a class for the grade summaries, running totals per student, subject and
+# period kept up to date by the gradebook writes so reports never scan raw grades
+class Grade_Summary_Schema(Base):
+    __tablename__ = "grade_summaries"
+    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), primary_key=True, nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
+    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
+    homework_total = Column(Double, nullable=False, server_default=text('0'))
+    homework_count = Column(Integer, nullable=False, server_default=text('0'))
+    test_total = Column(Double, nullable=False, server_default=text('0'))
+    test_count = Column(Integer, nullable=False, server_default=text('0'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+
+# create a class for the attendance summaries, kept up to date by the roll calls
+class Attendance_Summary_Schema(Base):
+    __tablename__ = "attendance_summaries"
+    student_id = Column(UUID, ForeignKey("students.id", ondelete='CASCADE'), primary_key=True, nullable=False)
+    subject_id = Column(UUID, ForeignKey("subjects.id", ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
+    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), primary_key=True, nullable=False, index=True)
+    attended = Column(Integer, nullable=False, server_default=text('0'))
+    last_attended_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
+
+# create a class for the login sessions, one per device, holding the hash of the
+# current refresh token so a leaked token is useless after the next rotation, and
+# of the token it replaced so presenting that one again can be told apart
+class Login_Session_Schema(Base):
+    __tablename__ = "login_sessions"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    user_id = Column(UUID, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     user = relationship('User_Schema')
-    period_id = Column(UUID, ForeignKey("periods.id", ondelete='CASCADE'), nullable=False)
\ No newline at end of file
+    token_hash = Column(String(64), nullable=False)
+    previous_token_hash = Column(String(64), nullable=True)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    revoked_at = Column(TIMESTAMP(timezone=True), nullable=True, index=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True, onupdate=func.now(), server_default=text('now()'))
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from typing import Optional
 from app.school_period.models.school_period_models import SchoolPeriod, SchoolPeriodResponse
 from app.database.database import get_db
 from app.schemas.schemas import Period_Schema
 from app.middleware import oauth2
+from app.utils.reference_cache import reference_cache, search_items
+from app.utils.conditional import conditional_body, modified_at, conditional_version
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -17,7 +20,7 @@ router = APIRouter(
 # define a route to create a new school period
 @router.post("/", response_model=SchoolPeriodResponse, response_description="Create a new school period", 
               status_code=status.HTTP_201_CREATED)
-async def create_school_period(period: SchoolPeriod, db: Session = Depends(get_db), 
+async def create_school_period(period: SchoolPeriod, db: AsyncSession = Depends(get_db), 
                           current_user: int = Depends(oauth2.get_current_user)):
     # check if the current user is an admin or superuser
     if (not current_user.is_admin) | (not current_user.is_superuser):
@@ -27,45 +30,60 @@ async def create_school_period(period: SchoolPeriod, db: Session = Depends(get_d
     # create a new school period
     new_period = Period_Schema(**period.dict())
     db.add(new_period)
-    db.commit()
-    db.refresh(new_period)
+    await db.commit()
+    await reference_cache.invalidate("periods")
     return new_period
 
 
 # define a route to get all school periods
 @router.get("/", response_model=list[SchoolPeriodResponse], response_description="Get all school periods",
               status_code=status.HTTP_200_OK)
-async def get_all_school_periods(db: Session = Depends(get_db), search: Optional[str] = ""):
-    # get all school periods
-    periods = db.query(Period_Schema).filter(Period_Schema.name.ilike(f"%{search}%")).all()
+async def get_all_school_periods(request: Request, response: Response, db: AsyncSession = Depends(get_db),
+                                 search: Optional[str] = ""):
+    # get all school periods, the database is only read on a cache miss
+    async def load():
+        result = await db.execute(select(Period_Schema))
+        return [SchoolPeriodResponse.from_orm(period).dict() for period in result.scalars().all()]
+
+    periods, etag = search_items(await reference_cache.get_or_load("periods", load), search)
 
     # if no school periods found
     if not periods:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail="No school periods found")
     
-    return periods
+    return conditional_body(request, response, periods, etag)
 
 
 #define a route to get a school period by id
 @router.get("/{period_id}", response_model=SchoolPeriodResponse, response_description="Get a school period by id",
               status_code=status.HTTP_200_OK)
-async def get_school_period_by_id(period_id: str, db: Session = Depends(get_db)):
-    # get a school period by id
-    period = db.query(Period_Schema).filter(Period_Schema.id == period_id).first()
+async def get_school_period_by_id(period_id: str, request: Request, response: Response,
+                                  db: AsyncSession = Depends(get_db)):
+    # read only the version of the school period first
+    result = await db.execute(select(modified_at(Period_Schema)).filter(Period_Schema.id == period_id))
+    last_modified = result.scalar()
 
     # if no school period found
-    if not period:
+    if not last_modified:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail=f"No school period with id {period_id} found")
 
+    not_modified = conditional_version(request, response, last_modified)
+    if not_modified:
+        return not_modified
+
+    # get a school period by id
+    result = await db.execute(select(Period_Schema).filter(Period_Schema.id == period_id))
+    period = result.scalars().first()
+
     return period
 
 
 # define a route to update a school period
 @router.patch("/{period_id}", response_model=SchoolPeriodResponse, response_description="Update a school period",
               status_code=status.HTTP_200_OK)
-async def update_school_period(period_id: uuid.UUID, period: SchoolPeriod, db: Session = Depends(get_db),
+async def update_school_period(period_id: uuid.UUID, period: SchoolPeriod, db: AsyncSession = Depends(get_db),
                                 current_user: int = Depends(oauth2.get_current_user)):
     # check if the current user is an admin or superuser
     if (not current_user.is_admin) | (not current_user.is_superuser):
@@ -73,7 +91,8 @@ async def update_school_period(period_id: uuid.UUID, period: SchoolPeriod, db: S
                             detail="Not authorized to perform this action")
     
     # get a school period by id
-    period_to_update = db.query(Period_Schema).filter(Period_Schema.id == period_id).first()
+    result = await db.execute(select(Period_Schema).filter(Period_Schema.id == period_id))
+    period_to_update = result.scalars().first()
 
     # if no school period found
     if not period_to_update:
@@ -84,6 +103,6 @@ async def update_school_period(period_id: uuid.UUID, period: SchoolPeriod, db: S
     period_to_update.name = period.name
     period_to_update.user_id = current_user.id
     
-    db.commit()
-    db.refresh(period_to_update)
+    await db.commit()
+    await reference_cache.invalidate("periods")
     return period_to_update
\ No newline at end of file
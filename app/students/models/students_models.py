@@ -22,7 +22,29 @@ class All_Students(Student_Create):
     id: uuid.UUID
     class Config:
         orm_mode = True
+
+# create a pydantic model for the batch lookup of students
+class Student_Batch_Response(BaseModel):
+    items: dict[uuid.UUID, All_Students]
+    missing: list[uuid.UUID]
     
+# create pydantic models for the bulk enrollment results
+class Bulk_Student_Result(BaseModel):
+    row: int
+    identification: Optional[str] = None
+    status: str
+    id: Optional[uuid.UUID] = None
+    detail: Optional[str] = None
+
+class Bulk_Students_Response(BaseModel):
+    created: int
+    failed: int
+    results: list[Bulk_Student_Result]
+
+# create a pydantic model for the ranked student search results
+class Student_Search_Result(All_Students):
+    rank: float
+
 # create a pydantic model for students response
 class Student_Response(All_Students):
     level_name: str
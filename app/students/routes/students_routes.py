@@ -1,11 +1,22 @@
-from fastapi import APIRouter, status, HTTPException, Depends, Request
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response, Query
+from sqlalchemy import select, func, or_, union
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, aliased
 import uuid
 from typing import Optional
-from app.students.models.students_models import Student_Create, Student_Response, All_Students
-from app.database.database import get_db
+from app.students.models.students_models import Student_Create, Student_Response, All_Students, Student_Search_Result, Bulk_Students_Response, Student_Batch_Response
+from app.database.database import get_db, get_read_db
 from app.schemas.schemas import Student_Schema, Person_Schema, Academic_Degree_Schema, Institution_Schema, User_Schema, Teacher_Schema
 from app.middleware import oauth2
+from app.database.tenancy import check_own_institution
+from app.utils.pagination import keyset_paginate, next_cursor, NEXT_CURSOR_HEADER
+from app.utils.bulk_reader import read_bulk_rows
+from app.utils.bulk_insert import insert_rows
+from app.utils.responses import rows_response
+from app.utils.batch import batch_ids, id_in, batch_result
+from app.utils.conditional import modified_at, latest, conditional_version
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -14,17 +25,46 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# largest number of students accepted by a single bulk enrollment
+MAX_BULK_STUDENTS = 5000
+
+# identifications checked against the database per query
+BULK_LOOKUP_CHUNK = 1000
+
+# match the search text anywhere in the names or the identification, the
+# pg_trgm GIN indexes on these columns serve the leading wildcard, an OR across
+# the two tables would only run after the join so each side is matched on its
+# own indexes and the students united, the inner queries use the tables since
+# the outer query is already scoped
+def student_search_filter(search: str):
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    persons = Person_Schema.__table__
+    students = Student_Schema.__table__
+
+    matching_persons = select(persons.c.id).filter(or_(persons.c.firstname.ilike(pattern, escape="\\"),
+                                                       persons.c.lastname.ilike(pattern, escape="\\")))
+
+    return Student_Schema.id.in_(union(
+        select(students.c.id).filter(students.c.person_id.in_(matching_persons)),
+        select(students.c.id).filter(students.c.identification.ilike(pattern, escape="\\")),
+    ))
+
 # define a route to create a student
 @router.post("/", response_description="Create a new student", status_code=status.HTTP_201_CREATED)
-async def create_student(student: Student_Create, db: Session = Depends(get_db), 
+async def create_student(student: Student_Create, db: AsyncSession = Depends(get_db), 
                     current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="You do not have permission to perform this action")
+
+    check_own_institution(current_user, student.institution_id)
     
     try:
-        # check if the student already exists
-        student_exists = db.query(Student_Schema).filter(Student_Schema.identification == student.identification).first()
+        # check if the student already exists, identifications are unique across institutions
+        result = await db.execute(select(Student_Schema).filter(Student_Schema.identification == student.identification
+                                  ).execution_options(skip_institution_scope=True))
+        student_exists = result.scalars().first()
     
         # if the student exists, raise an exception
         if student_exists:
@@ -44,8 +84,6 @@ async def create_student(student: Student_Create, db: Session = Depends(get_db),
         new_person = Person_Schema(**person_to_dict)
 
         db.add(new_person)
-        db.commit()
-        db.refresh(new_person)
 
         # create a new dictionary to store the student data
         student_to_dict = {
@@ -54,161 +92,374 @@ async def create_student(student: Student_Create, db: Session = Depends(get_db),
         "level_id": student.level_id,
         "user_id": current_user.id,
         "observations": student.observations,
-        "person_id": new_person.id, 
         }
 
-        # save the student data to the database
-        new_student = Student_Schema(**student_to_dict)
+        # save the person and the student in a single transaction, the
+        # relationship lets the flush fill in person_id
+        new_student = Student_Schema(**student_to_dict, person=new_person)
         db.add(new_student)
-        db.commit()
-        db.refresh(new_student)
+        await db.commit()
 
         return {"message": "Student created successfully",}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(str(e))
 
 
+# define a route to enroll many students in one transaction, the body is a JSON
+# array, NDJSON (application/x-ndjson) or CSV (text/csv) with a header row
+@router.post("/bulk", response_description="Enroll students in bulk", response_model=Bulk_Students_Response,
+             status_code=status.HTTP_200_OK)
+async def create_students_bulk(request: Request, db: AsyncSession = Depends(get_db),
+                    current_user: int = Depends(oauth2.get_current_user)):
+    if (not current_user.is_admin) | (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You do not have permission to perform this action")
+
+    rows = await read_bulk_rows(request, MAX_BULK_STUDENTS)
+    results = []
+    students = []
+
+    # validate every row and drop repeated identifications within the request
+    seen = set()
+    for index, row in enumerate(rows):
+        try:
+            student = Student_Create.parse_obj(row)
+        except ValidationError as e:
+            identification = row.get("identification") if isinstance(row, dict) else None
+            results.append({"row": index, "identification": identification, "status": "invalid", "detail": str(e)})
+            continue
+
+        if student.identification in seen:
+            results.append({"row": index, "identification": student.identification, "status": "duplicate",
+                            "detail": "Identification repeated in the request"})
+            continue
+
+        seen.add(student.identification)
+        students.append((index, student))
+
+    # find the identifications that are already enrolled with set based lookups
+    existing = set()
+    identifications = [student.identification for _, student in students]
+    for start in range(0, len(identifications), BULK_LOOKUP_CHUNK):
+        query = await db.execute(select(Student_Schema.identification).filter(
+                            Student_Schema.identification.in_(identifications[start:start + BULK_LOOKUP_CHUNK])
+                            ).execution_options(skip_institution_scope=True))
+        existing.update(query.scalars().all())
+
+    # the levels the rows reference, so a wrong id only fails its row
+    level_ids = list({student.level_id for _, student in students})
+    known_levels = set()
+    if students:
+        query = await db.execute(select(Academic_Degree_Schema.id).filter(id_in(Academic_Degree_Schema.id, level_ids)))
+        known_levels = {str(level_id) for level_id in query.scalars().all()}
+
+    person_rows = []
+    student_rows = []
+    created = []
+
+    for index, student in students:
+        if student.identification in existing:
+            results.append({"row": index, "identification": student.identification, "status": "duplicate",
+                            "detail": f"Student with identification {student.identification} already exists"})
+            continue
+
+        if str(student.level_id) not in known_levels:
+            results.append({"row": index, "identification": student.identification, "status": "invalid",
+                            "detail": f"Level with id {student.level_id} not found"})
+            continue
+
+        # only the user's own institution, which exists, is accepted
+        if str(student.institution_id) != str(current_user.institution_id):
+            results.append({"row": index, "identification": student.identification, "status": "invalid",
+                            "detail": "You can only enroll students in your own institution"})
+            continue
+
+        # ids are generated here so both inserts can run without reading them back
+        person_id = uuid.uuid4()
+        student_id = uuid.uuid4()
+        person_rows.append({
+            "id": person_id,
+            "firstname": student.firstname,
+            "lastname": student.lastname,
+            "address": student.address,
+            "phone": student.phone,
+            "institution_id": student.institution_id,
+        })
+        student_rows.append({
+            "id": student_id,
+            "identification": student.identification,
+            "contact": student.contact,
+            "level_id": student.level_id,
+            "user_id": current_user.id,
+            "observations": student.observations,
+            "person_id": person_id,
+        })
+        created.append({"row": index, "identification": student.identification, "status": "created", "id": student_id})
+
+    # multi-row inserts of persons and students in chunks under the bind
+    # parameter limit, committed together
+    if person_rows:
+        try:
+            await insert_rows(db, Person_Schema, person_rows)
+            await insert_rows(db, Student_Schema, student_rows)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"No students were enrolled: {e.orig}")
+
+    results.extend(created)
+    results.sort(key=lambda result: result["row"])
+
+    return {"created": len(created), "failed": len(results) - len(created), "results": results}
+
+
+# columns of a student in the list of students, in the order of the response
+student_columns = (Student_Schema.id, Student_Schema.identification, Student_Schema.contact, Student_Schema.level_id,
+                   Student_Schema.observations, Person_Schema.firstname, Person_Schema.lastname,
+                   Person_Schema.address, Person_Schema.phone, Person_Schema.institution_id)
+student_field_names = [column.key for column in student_columns]
+
 # define a route to get all students
 @router.get("/", response_description="Get all students", response_model=list[All_Students],
             status_code=status.HTTP_200_OK)
-async def get_students(db: Session = Depends(get_db),
+async def get_students(db: AsyncSession = Depends(get_read_db),
                     current_user: int = Depends(oauth2.get_current_user),
-                    limit: int = 10, skip: int = 0, search: Optional[str] = ""):
+                    limit: int = 10, skip: int = 0, search: Optional[str] = "", cursor: Optional[str] = None):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="You do not have permission to perform this action")
-    
-    result = []
+
+    # only the columns of All_Students, the person id keys the next page
+    students_query = select(*student_columns, Person_Schema.id.label("person_id")
+                        ).join(Person_Schema, Student_Schema.person_id == Person_Schema.id, isouter=True)
+
+    if search:
+        students_query = students_query.filter(student_search_filter(search))
+
+    # passing a cursor (empty for the first page) switches from offset to keyset pagination
+    if cursor is not None:
+        students_query = keyset_paginate(students_query, cursor, limit)
+    else:
+        students_query = students_query.limit(limit).offset(skip)
 
     try:
-        students = db.query(Student_Schema).options(joinedload(Student_Schema.person)
-                        ).join(Person_Schema, Student_Schema.person_id == Person_Schema.id, isouter=True
-                        ).filter(Person_Schema.firstname.like(f"%{search}%")).limit(limit).offset(skip).all()
+        query = await db.execute(students_query)
+        students = query.all()
 
         if students == []:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="No students found")
-        
-        # loop through the students and append them to the result list
-        for student in students:
-            user_data = {
-                "id": student.id,
-                "identification": student.identification,
-                "contact": student.contact,
-                "level_id": student.level_id,
-                "observations": student.observations,
-                "firstname": student.person.firstname,
-                "lastname": student.person.lastname,
-                "address": student.person.address,
-                "phone": student.person.phone,
-                "institution_id": student.person.institution_id,
-            }
 
-            result.append(user_data)
+        headers = {}
+
+        if cursor is not None:
+            new_cursor = next_cursor(students, limit, id_key="person_id")
+            if new_cursor:
+                headers[NEXT_CURSOR_HEADER] = new_cursor
         
-        # return the result list
-        return result
+        # the rows already have the shape of All_Students
+        return rows_response(students, student_field_names, headers)
     except Exception as e:
         print(str(e))
 
 
-# define a route to get a student by id
-@router.get("/{id}", response_description="Get a student by id", response_model=Student_Response,
+# the students matching the search text, ranked by the best trigram word
+# similarity among the searched columns
+def student_search_query(q: str, limit: int):
+    rank = func.greatest(func.word_similarity(q, Person_Schema.firstname),
+                         func.word_similarity(q, Person_Schema.lastname),
+                         func.word_similarity(q, Student_Schema.identification)).label("rank")
+
+    return select(Student_Schema, Person_Schema, rank
+                ).join(Person_Schema, Student_Schema.person_id == Person_Schema.id
+                ).filter(student_search_filter(q)
+                ).order_by(rank.desc(), Person_Schema.lastname, Person_Schema.id).limit(limit)
+
+
+# define a route to search students by name or identification, best matches first
+@router.get("/search", response_description="Search students by name or identification",
+            response_model=list[Student_Search_Result], status_code=status.HTTP_200_OK)
+async def search_students(q: str, db: AsyncSession = Depends(get_read_db),
+                    current_user: int = Depends(oauth2.get_current_user), limit: int = 10):
+    if (not current_user.is_admin) | (not current_user.is_superuser):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You do not have permission to perform this action")
+    
+    q = q.strip()
+
+    if not q:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The search text can not be empty")
+
+    query = await db.execute(student_search_query(q, limit))
+
+    result = []
+
+    for student, person, student_rank in query.all():
+        result.append({
+            "id": student.id,
+            "identification": student.identification,
+            "contact": student.contact,
+            "level_id": student.level_id,
+            "observations": student.observations,
+            "firstname": person.firstname,
+            "lastname": person.lastname,
+            "address": person.address,
+            "phone": person.phone,
+            "institution_id": person.institution_id,
+            "rank": student_rank,
+        })
+
+    return result
+
+
+# define a route to get many students by id with a single query, the ids that
+# are not found are listed apart instead of failing the batch
+@router.get("/batch", response_description="Get many students by id", response_model=Student_Batch_Response,
             status_code=status.HTTP_200_OK)
-async def get_student(id: str, db: Session = Depends(get_db)):
-    student = db.query(Teacher_Schema).options(joinedload(Teacher_Schema.student)
-                        ).filter(Student_Schema.id == id).all()
+async def get_students_batch(ids: list[uuid.UUID] = Query(...), db: AsyncSession = Depends(get_read_db),
+                             current_user: int = Depends(oauth2.get_current_user)):
+    ids = batch_ids(ids)
+
+    result = await db.execute(select(*student_columns
+                        ).join(Person_Schema, Student_Schema.person_id == Person_Schema.id
+                        ).filter(id_in(Student_Schema.id, ids)))
+
+    return batch_result(ids, [student._asdict() for student in result.all()])
+
+
+# version of a student profile from the rows it is built from, a single query
+# that answers 304 without loading the profile
+async def check_student_version(request: Request, response: Response, db: AsyncSession, condition):
+    creator = aliased(Person_Schema)
+    teacher_person = aliased(Person_Schema)
+    teachers = select(Teacher_Schema).join(User_Schema, User_Schema.id == Teacher_Schema.teacher_id
+                        ).join(teacher_person, teacher_person.id == User_Schema.person_id
+                        ).filter(Teacher_Schema.student_id == Student_Schema.id
+                        ).correlate(Student_Schema)
+
+    result = await db.execute(select(latest(modified_at(Student_Schema), modified_at(Person_Schema),
+                                                   modified_at(Institution_Schema), modified_at(Academic_Degree_Schema),
+                                                   modified_at(creator),
+                                                   teachers.with_only_columns(func.max(latest(
+                                                        modified_at(Teacher_Schema), modified_at(teacher_person))))
+                                                        .scalar_subquery()
+                                                   ).label("last_modified"),
+                                     teachers.with_only_columns(func.count()).scalar_subquery().label("teachers")
+                        ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                        ).join(Institution_Schema, Institution_Schema.id == Person_Schema.institution_id
+                        ).join(Academic_Degree_Schema, Academic_Degree_Schema.id == Student_Schema.level_id
+                        ).join(User_Schema, User_Schema.id == Student_Schema.user_id
+                        ).join(creator, creator.id == User_Schema.person_id
+                        ).filter(condition))
+    version = result.first()
+
     # if the student does not exist, raise an exception
-    if not student:
+    if version is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Student not found")
-    # create a new dictionary to store the student data
-
-    teachers = []
-
-    for i in student:
-        teachers_info = {
-            "teacher_id": i.teacher_id,
-            "teacher_name": f"{i.teacher.person.firstname} {i.teacher.person.lastname}",
-        }
-        teachers.append(teachers_info)
 
-    user_data = {
-                "id": student[0].id,
-                "firstname": student[0].student.person.firstname,
-                "lastname": student[0].student.person.lastname,
-                "address": student[0].student.person.address,
-                "phone": student[0].student.person.phone,
-                "institution_id": student[0].student.person.institution_id,
-                "institution_name": student[0].student.person.institution.name,
-                "level_id": student[0].student.level_id,
-                "level_name": student[0].student.level.name,
-                "contact": student[0].student.contact,
-                "observations": student[0].student.observations,
-                "person_id": student[0].student.person_id,
-                "identification": student[0].student.identification,
-                "user_id": student[0].student.user_id,
-                "created_by": f"{student[0].student.user.person.firstname} {student[0].student.user.person.lastname}",
-                "teachers": teachers,
-            }
+    return conditional_version(request, response, version.last_modified, version.teachers)
 
-    return user_data
 
+# build a student profile with a fixed number of queries, one for the student
+# with its person, institution, level and creator and one for its teachers
+async def get_student_profile(db: AsyncSession, condition):
+    creator = aliased(Person_Schema)
+    result = await db.execute(select(Student_Schema.id, Student_Schema.identification, Student_Schema.contact,
+                                     Student_Schema.level_id, Student_Schema.observations, Student_Schema.person_id,
+                                     Student_Schema.user_id, Person_Schema.firstname, Person_Schema.lastname,
+                                     Person_Schema.address, Person_Schema.phone, Person_Schema.institution_id,
+                                     Institution_Schema.name.label("institution_name"),
+                                     Academic_Degree_Schema.name.label("level_name"),
+                                     creator.firstname.label("creator_firstname"),
+                                     creator.lastname.label("creator_lastname")
+                        ).join(Person_Schema, Person_Schema.id == Student_Schema.person_id
+                        ).join(Institution_Schema, Institution_Schema.id == Person_Schema.institution_id
+                        ).join(Academic_Degree_Schema, Academic_Degree_Schema.id == Student_Schema.level_id
+                        ).join(User_Schema, User_Schema.id == Student_Schema.user_id
+                        ).join(creator, creator.id == User_Schema.person_id
+                        ).filter(condition))
+    student = result.first()
 
-# define a route to get a student by identification
-@router.get("/{identification}/identification", response_description="Get a student by identification (DNI)", 
-            response_model=Student_Response, status_code=status.HTTP_200_OK)
-async def get_student(identification: str, db: Session = Depends(get_db)):
-    student = db.query(Teacher_Schema).options(joinedload(Teacher_Schema.student)
-                        ).filter(Student_Schema.identification == identification).all()
     # if the student does not exist, raise an exception
-    if not student:
+    if student is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Student not found")
-    # create a new dictionary to store the student data
+
+    result = await db.execute(select(Teacher_Schema.teacher_id, Person_Schema.firstname, Person_Schema.lastname
+                        ).join(User_Schema, User_Schema.id == Teacher_Schema.teacher_id
+                        ).join(Person_Schema, Person_Schema.id == User_Schema.person_id
+                        ).filter(Teacher_Schema.student_id == student.id))
+
     teachers = []
 
-    for i in student:
+    for teacher in result.all():
         teachers_info = {
-            "teacher_id": i.teacher_id,
-            "teacher_name": f"{i.teacher.person.firstname} {i.teacher.person.lastname}",
+            "teacher_id": teacher.teacher_id,
+            "teacher_name": f"{teacher.firstname} {teacher.lastname}",
         }
         teachers.append(teachers_info)
 
+    # create a new dictionary to store the student data
     user_data = {
-                "id": student[0].id,
-                "firstname": student[0].student.person.firstname,
-                "lastname": student[0].student.person.lastname,
-                "address": student[0].student.person.address,
-                "phone": student[0].student.person.phone,
-                "institution_id": student[0].student.person.institution_id,
-                "institution_name": student[0].student.person.institution.name,
-                "level_id": student[0].student.level_id,
-                "level_name": student[0].student.level.name,
-                "contact": student[0].student.contact,
-                "observations": student[0].student.observations,
-                "person_id": student[0].student.person_id,
-                "identification": student[0].student.identification,
-                "user_id": student[0].student.user_id,
-                "created_by": f"{student[0].student.user.person.firstname} {student[0].student.user.person.lastname}",
+                "id": student.id,
+                "firstname": student.firstname,
+                "lastname": student.lastname,
+                "address": student.address,
+                "phone": student.phone,
+                "institution_id": student.institution_id,
+                "institution_name": student.institution_name,
+                "level_id": student.level_id,
+                "level_name": student.level_name,
+                "contact": student.contact,
+                "observations": student.observations,
+                "person_id": student.person_id,
+                "identification": student.identification,
+                "user_id": student.user_id,
+                "created_by": f"{student.creator_firstname} {student.creator_lastname}",
                 "teachers": teachers,
             }
 
     return user_data
 
 
+# define a route to get a student by id
+@router.get("/{id}", response_description="Get a student by id", response_model=Student_Response,
+            status_code=status.HTTP_200_OK)
+async def get_student(id: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    not_modified = await check_student_version(request, response, db, Student_Schema.id == id)
+    if not_modified:
+        return not_modified
+
+    return await get_student_profile(db, Student_Schema.id == id)
+
+
+# define a route to get a student by identification
+@router.get("/{identification}/identification", response_description="Get a student by identification (DNI)", 
+            response_model=Student_Response, status_code=status.HTTP_200_OK)
+async def get_student(identification: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    not_modified = await check_student_version(request, response, db, Student_Schema.identification == identification)
+    if not_modified:
+        return not_modified
+
+    return await get_student_profile(db, Student_Schema.identification == identification)
+
+
 # define a route to update a student
 @router.put("/{id}", response_description="Update a student",
             status_code=status.HTTP_200_OK)
-async def update_student(id: uuid.UUID, request: Request, db: Session = Depends(get_db),
+async def update_student(id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db),
                             current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="You do not have permission to perform this action")
     
     # Creates an instance of the database engine and a session
-    student_exists = db.query(Student_Schema).get(id)
+    result = await db.execute(select(Student_Schema).options(joinedload(Student_Schema.person)).filter(Student_Schema.id == id))
+    student_exists = result.scalars().first()
 
     # if the user is not found, raise an exception
     if not student_exists:
@@ -217,6 +468,8 @@ async def update_student(id: uuid.UUID, request: Request, db: Session = Depends(
     # Parse the data in the body of the request
     updated_data = await request.json()
 
+    check_own_institution(current_user, updated_data.get("institution_id"))
+
     # Update the fields provided in the request body
     for field, value in updated_data.items():
         if hasattr(student_exists, field):
@@ -224,7 +477,6 @@ async def update_student(id: uuid.UUID, request: Request, db: Session = Depends(
         elif hasattr(student_exists.person, field):
             setattr(student_exists.person, field, value)
 
-    db.commit()
-    db.refresh(student_exists)
+    await db.commit()
 
     return {"message": "Student updated successfully"}
\ No newline at end of file
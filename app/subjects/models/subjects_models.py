@@ -11,4 +11,9 @@ class Subject_Create(BaseModel):
 class Subject_Response(Subject_Create):
     id: uuid.UUID
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# create a pydantic model for the batch lookup of subjects
+class Subject_Batch_Response(BaseModel):
+    items: dict[uuid.UUID, Subject_Response]
+    missing: list[uuid.UUID]
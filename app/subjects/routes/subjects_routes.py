@@ -1,11 +1,15 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response, Query
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from typing import Optional
-from app.subjects.models.subjects_models import Subject_Create, Subject_Response
+from app.subjects.models.subjects_models import Subject_Create, Subject_Response, Subject_Batch_Response
 from app.database.database import get_db
 from app.schemas.schemas import Subject_Schema
 from app.middleware import oauth2
+from app.utils.reference_cache import reference_cache, search_items
+from app.utils.batch import batch_ids, batch_result
+from app.utils.conditional import conditional_body, modified_at, conditional_version
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -17,7 +21,7 @@ router = APIRouter(
 # define the route for creating a new subject
 @router.post("/", response_description="Create a new subject", status_code=status.HTTP_201_CREATED, 
                 response_model=Subject_Response)
-async def create_subject(subject: Subject_Create, db: Session = Depends(get_db), 
+async def create_subject(subject: Subject_Create, db: AsyncSession = Depends(get_db), 
                     current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, 
@@ -25,35 +29,65 @@ async def create_subject(subject: Subject_Create, db: Session = Depends(get_db),
     #save the subject to the database
     new_subject = Subject_Schema(**subject.dict())
     db.add(new_subject)
-    db.commit()
-    db.refresh(new_subject)
+    await db.commit()
+    await reference_cache.invalidate("subjects")
     return new_subject
 
 
+# every subject, loaded into the reference cache on a miss
+async def load_subjects(db: AsyncSession):
+    result = await db.execute(select(Subject_Schema))
+    return [Subject_Response.from_orm(subject).dict() for subject in result.scalars().all()]
+
+
 #define a route for getting all subjects
 @router.get("/", response_description="Get all subjects", response_model=list[Subject_Response],
             status_code=status.HTTP_200_OK)
-async def get_all_subjects(db: Session = Depends(get_db), search: Optional[str] = ""):
-    subjects = db.query(Subject_Schema).filter(Subject_Schema.name.ilike(f"%{search}%")).all()
+async def get_all_subjects(request: Request, response: Response, db: AsyncSession = Depends(get_db),
+                           search: Optional[str] = ""):
+    # the database is only read on a cache miss, the search runs on the cached subjects
+    entry = await reference_cache.get_or_load("subjects", lambda: load_subjects(db))
+    subjects, etag = search_items(entry, search)
 
     #if no subjects are found, raise an exception
     if not subjects:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail="No subjects found")
     
-    return subjects
+    return conditional_body(request, response, subjects, etag)
+
+
+# define a route to get many subjects by id, resolved from the cached subjects,
+# the ids that are not found are listed apart instead of failing the batch
+@router.get("/batch", response_description="Get many subjects by id", response_model=Subject_Batch_Response,
+            status_code=status.HTTP_200_OK)
+async def get_subjects_batch(ids: list[uuid.UUID] = Query(...), db: AsyncSession = Depends(get_db)):
+    ids = batch_ids(ids)
+    entry = await reference_cache.get_or_load("subjects", lambda: load_subjects(db))
+
+    return batch_result(ids, entry["items"])
 
 
 #define a route for getting a single subject
 @router.get("/{subject_id}", response_description="Get a single subject by id", response_model=Subject_Response,
             status_code=status.HTTP_200_OK)
-async def get_subject_by_id(subject_id: uuid.UUID, db: Session = Depends(get_db)):
-    subject = db.query(Subject_Schema).filter(Subject_Schema.id == subject_id).first()
+async def get_subject_by_id(subject_id: uuid.UUID, request: Request, response: Response,
+                            db: AsyncSession = Depends(get_db)):
+    # read only the version of the subject first
+    result = await db.execute(select(modified_at(Subject_Schema)).filter(Subject_Schema.id == subject_id))
+    last_modified = result.scalar()
 
     #if no subject is found, raise an exception
-    if not subject:
+    if not last_modified:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail=f"Subject with id {subject_id} not found")
+
+    not_modified = conditional_version(request, response, last_modified)
+    if not_modified:
+        return not_modified
+
+    result = await db.execute(select(Subject_Schema).filter(Subject_Schema.id == subject_id))
+    subject = result.scalars().first()
     
     return subject
 
@@ -62,20 +96,22 @@ async def get_subject_by_id(subject_id: uuid.UUID, db: Session = Depends(get_db)
 
 @router.patch("/{subject_id}", response_description="Update a subject", response_model=Subject_Response,
             status_code=status.HTTP_200_OK)
-async def update_subject(subject_id: uuid.UUID, subject: Subject_Create, db: Session = Depends(get_db),
+async def update_subject(subject_id: uuid.UUID, subject: Subject_Create, db: AsyncSession = Depends(get_db),
                             current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, 
                             detail="You are not authorized to perform this action")
     
-    subject_query = db.query(Subject_Schema).filter(Subject_Schema.id == subject_id)
-    subject_query_result = subject_query.first()
+    # update and read back the subject in one statement
+    result = await db.execute(update(Subject_Schema).filter(Subject_Schema.id == subject_id
+                                ).values(**subject.dict()).returning(Subject_Schema))
+    subject_query_result = result.scalars().first()
 
     #if no subject is found, raise an exception
     if not subject_query_result:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail=f"Subject with id {subject_id} not found")
     
-    subject_query.update(**subject.dict(), synchronize_session=False)
-    db.commit()
-    return subject_query.first()
\ No newline at end of file
+    await db.commit()
+    await reference_cache.invalidate("subjects")
+    return subject_query_result
\ No newline at end of file
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, status, HTTPException, Depends, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import uuid
 from app.teachers.models.teachers_models import Teachers_Create, Teachers_Response
 from app.database.database import get_db
-from app.schemas.schemas import Teacher_Schema
+from app.schemas.schemas import Teacher_Schema, User_Schema
 from app.middleware import oauth2
+from app.database.tenancy import students_out_of_scope
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -16,16 +19,25 @@ router = APIRouter(
 # add a new teacher to students
 @router.post("/", response_description="Add a new teacher to students", status_code=status.HTTP_201_CREATED,
               response_model=Teachers_Response)
-async def add_teacher(body: Teachers_Create, db: Session = Depends(get_db),
+async def add_teacher(body: Teachers_Create, db: AsyncSession = Depends(get_db),
                       current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, 
                             detail="Not authorized to perform requested action")
     
+    if await students_out_of_scope(db, [body.student_id]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Student with id {body.student_id} not found")
+
     new_student = Teacher_Schema(**body.dict())
     db.add(new_student)
-    db.commit()
-    db.refresh(new_student)
+    await db.flush()
+
+    # load the teacher's name inside the same transaction
+    result = await db.execute(select(Teacher_Schema).options(joinedload(Teacher_Schema.teacher).joinedload(User_Schema.person)
+                                    ).filter(Teacher_Schema.id == new_student.id))
+    new_student = result.scalars().first()
+    await db.commit()
 
     return {
         "id": new_student.id,
@@ -37,19 +49,20 @@ async def add_teacher(body: Teachers_Create, db: Session = Depends(get_db),
 
 # remove a teacher from students
 @router.delete("/{id}", response_description="Remove a teacher from students", status_code=status.HTTP_204_NO_CONTENT)
-async def remove_teacher(id: uuid.UUID, db: Session = Depends(get_db),
+async def remove_teacher(id: uuid.UUID, db: AsyncSession = Depends(get_db),
                           current_user: int = Depends(oauth2.get_current_user)):
     if (not current_user.is_admin) | (not current_user.is_superuser):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, 
                             detail="Not authorized to perform requested action")
     
-    query = db.query(Teacher_Schema).filter(Teacher_Schema.id == id).first()
+    result = await db.execute(select(Teacher_Schema).filter(Teacher_Schema.id == id))
+    query = result.scalars().first()
     
     if not query:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail=f"This id {id} does not exist")
     
-    db.delete(query)
-    db.commit()
+    await db.delete(query)
+    await db.commit()
     
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -28,6 +28,11 @@ class User_Response(User_Login):
     phone: Optional[str] = None
     address: Optional[str] = None
 
+# create a pydantic model for the batch lookup of users
+class User_Batch_Response(BaseModel):
+    items: dict[uuid.UUID, User_Response]
+    missing: list[uuid.UUID]
+
 # create a pydantic model for update user
 class User_Update(BaseModel):
     firstname: Optional[str] = None
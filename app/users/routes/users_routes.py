@@ -1,12 +1,20 @@
-from fastapi import APIRouter, status, HTTPException, Depends, Request
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import uuid
 from typing import Optional
-from app.users.models.users_models import User_Create, User_Response, User_Update
-from app.database.database import get_db
+from app.users.models.users_models import User_Create, User_Response, User_Update, User_Batch_Response
+from app.database.database import get_db, get_read_db
 from app.schemas.schemas import User_Schema, Person_Schema
-from app.utils.jwt_token import hash
+from app.utils.jwt_token import hash_async
+from app.utils.login_sessions import revoke_user_sessions
 from app.middleware import oauth2
+from app.database.tenancy import check_own_institution
+from app.utils.pagination import keyset_paginate, next_cursor, NEXT_CURSOR_HEADER
+from app.utils.responses import rows_response
+from app.utils.batch import batch_ids, id_in, batch_result
+from app.utils.conditional import modified_at, latest, conditional_version
 
 # create an instance of the APIRouter class
 router = APIRouter(
@@ -18,10 +26,11 @@ router = APIRouter(
 #route and function to create a new user
 @router.post("/", response_description="Create a new user", 
                 status_code=status.HTTP_201_CREATED)
-async def create_user(user: User_Create, db: Session = Depends(get_db)):
+async def create_user(user: User_Create, db: AsyncSession = Depends(get_db)):
     try:
         # check if the user already exists
-        user_exists = db.query(User_Schema).filter(User_Schema.email == user.email).first()
+        result = await db.execute(select(User_Schema).filter(User_Schema.email == user.email))
+        user_exists = result.scalars().first()
     
         # if the user exists, raise an exception
         if user_exists:
@@ -40,77 +49,111 @@ async def create_user(user: User_Create, db: Session = Depends(get_db)):
         new_person = Person_Schema(**person_to_dict)
 
         db.add(new_person)
-        db.commit()
-        db.refresh(new_person)
 
         #hash the password - user.password
-        hashed_pwd = hash(user.password)
+        hashed_pwd = await hash_async(user.password)
 
         # create a new dictionary to store the user data
         user_to_dict = {
         "email": user.email,
         "password": hashed_pwd,
-        "person_id": new_person.id, 
         }
 
-        # save the user data to the database
-        new_user = User_Schema(**user_to_dict)
+        # save the person and the user in a single transaction, the
+        # relationship lets the flush fill in person_id
+        new_user = User_Schema(**user_to_dict, person=new_person)
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
 
         return {"message": "User created successfully",}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(str(e))
 
+# columns of a user in the list of users, in the order of the response
+user_columns = (User_Schema.id, User_Schema.email, Person_Schema.firstname, Person_Schema.lastname,
+                Person_Schema.address, Person_Schema.phone, Person_Schema.institution_id,
+                User_Schema.is_superuser, User_Schema.is_admin, User_Schema.is_teacher)
+user_field_names = [column.key for column in user_columns]
+
 # create a function to get all users
 @router.get("/", response_description="Get all users", response_model=list[User_Response], status_code=status.HTTP_200_OK)
-async def get_users(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user),
-                    limit: int = 10, skip: int = 0, search: Optional[str] = ""):
+async def get_users(db: AsyncSession = Depends(get_read_db), 
+                    current_user: int = Depends(oauth2.get_current_user),
+                    limit: int = 10, skip: int = 0, search: Optional[str] = "", cursor: Optional[str] = None):
     if not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
                             detail="You are not authorized to perform this action")
-        
-    result = []
 
-    # Creates an instance of the database engine and a session
-    users = db.query(User_Schema).options(joinedload(User_Schema.person)).limit(limit).offset(skip).all()
+    # only the columns of User_Response, the person id keys the next page
+    users_query = select(*user_columns, Person_Schema.id.label("person_id")
+                        ).join(Person_Schema, User_Schema.person_id == Person_Schema.id)
+
+    # passing a cursor (empty for the first page) switches from offset to keyset pagination
+    if cursor is not None:
+        users_query = keyset_paginate(users_query, cursor, limit)
+    else:
+        users_query = users_query.limit(limit).offset(skip)
+
+    query = await db.execute(users_query)
+    users = query.all()
 
     # if the users are not found, raise an exception
     if users == []:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Users not found")
+
+    headers = {}
+
+    if cursor is not None:
+        new_cursor = next_cursor(users, limit, id_key="person_id")
+        if new_cursor:
+            headers[NEXT_CURSOR_HEADER] = new_cursor
         
-    # loop through the users and append them to the result list
-    for user in users:
-        user_data = {
-            "id": user.id,
-            "email": user.email,
-            "firstname": user.person.firstname,
-            "lastname": user.person.lastname,
-            "address": user.person.address,
-            "phone": user.person.phone,
-            "institution_id": user.person.institution_id,
-            "is_superuser": user.is_superuser,
-            "is_admin": user.is_admin,
-            "is_teacher": user.is_teacher
-        }
-        result.append(user_data)
-        
-    # return the result list
-    return result
+    # the rows already have the shape of User_Response
+    return rows_response(users, user_field_names, headers)
+
+# get many users by id with a single query, the ids that are not found are
+# listed apart instead of failing the batch
+@router.get("/batch", response_description="Get many users by id", response_model=User_Batch_Response,
+            status_code=status.HTTP_200_OK)
+async def get_users_batch(ids: list[uuid.UUID] = Query(...), db: AsyncSession = Depends(get_read_db),
+                          current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
+                            detail="You are not authorized to perform this action")
+
+    ids = batch_ids(ids)
+
+    result = await db.execute(select(*user_columns
+                        ).join(Person_Schema, User_Schema.person_id == Person_Schema.id
+                        ).filter(id_in(User_Schema.id, ids)))
+
+    return batch_result(ids, [user._asdict() for user in result.all()])
 
 #get a single user by id
 @router.get("/{id}", response_description="Get a single user", 
             response_model=User_Response, status_code=status.HTTP_200_OK)
-async def get_user(id: uuid.UUID, db: Session = Depends(get_db), 
+async def get_user(id: uuid.UUID, request: Request, response: Response, db: AsyncSession = Depends(get_db), 
                     current_user: int = Depends(oauth2.get_current_user)):
     if not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
                             detail="You are not authorized to perform this action")
+
+    # read only the version of the user, so an unchanged user costs a single light query
+    result = await db.execute(select(latest(modified_at(User_Schema), modified_at(Person_Schema)))
+                        .join(Person_Schema, Person_Schema.id == User_Schema.person_id).filter(User_Schema.id == id))
+    last_modified = result.scalar()
+
+    if last_modified is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {id} not found")
+
+    not_modified = conditional_version(request, response, last_modified)
+    if not_modified:
+        return not_modified
         
     # Creates an instance of the database engine and a session
-    user = db.query(User_Schema).options(joinedload(User_Schema.person)).filter(User_Schema.id == id).first()
+    result = await db.execute(select(User_Schema).options(joinedload(User_Schema.person)).filter(User_Schema.id == id))
+    user = result.scalars().first()
 
     # if the user is not found, raise an exception
     if user == None:
@@ -135,10 +178,11 @@ async def get_user(id: uuid.UUID, db: Session = Depends(get_db),
 
 # function to update a user
 @router.patch("/{id}", response_description="Update a user", status_code=status.HTTP_200_OK)
-async def update_user(id: uuid.UUID, request: Request, user: User_Update, db: Session = Depends(get_db),
+async def update_user(id: uuid.UUID, request: Request, user: User_Update, db: AsyncSession = Depends(get_db),
                         current_user: int = Depends(oauth2.get_current_user)):
     # Creates an instance of the database engine and a session
-    user_exists = db.query(User_Schema).get(id)
+    result = await db.execute(select(User_Schema).options(joinedload(User_Schema.person)).filter(User_Schema.id == id))
+    user_exists = result.scalars().first()
 
     # if the user is not found, raise an exception
     if not user_exists:
@@ -150,6 +194,8 @@ async def update_user(id: uuid.UUID, request: Request, user: User_Update, db: Se
     # Parse the data in the body of the request
     updated_data = await request.json()
 
+    check_own_institution(current_user, updated_data.get("institution_id"))
+
     # Update the fields provided in the request body
     for field, value in updated_data.items():
         if hasattr(user_exists, field):
@@ -159,9 +205,14 @@ async def update_user(id: uuid.UUID, request: Request, user: User_Update, db: Se
 
     # Update the password and hash it
     if user.password:
-        user_exists.password = hash(user.password)
+        user_exists.password = await hash_async(user.password)
+
+        # a new password logs out every device
+        await revoke_user_sessions(db, user_exists.id, oauth2.revoked_sessions)
+
+    await db.commit()
 
-    db.commit()
-    db.refresh(user_exists)
+    # drop the cached roles so the next request sees the update
+    oauth2.principal_cache.invalidate(user_exists.id)
 
     return {"message": "User updated successfully"}
\ No newline at end of file
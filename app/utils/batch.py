@@ -0,0 +1,37 @@
+import uuid
+from fastapi import status, HTTPException
+from sqlalchemy import any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# most ids accepted by a single batch lookup
+MAX_BATCH_IDS = 200
+
+
+# the ids of a batch without repeats, in the order they were asked for
+def batch_ids(ids: list[uuid.UUID]):
+    ids = list(dict.fromkeys(ids))
+
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="At least one id is required")
+
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A batch can not have more than {MAX_BATCH_IDS} ids")
+
+    return ids
+
+
+# column = ANY(:ids), a single array parameter keeps the statement text the same
+# whatever the number of ids so the driver reuses its prepared statement
+def id_in(column, ids: list[uuid.UUID]):
+    return column == any_(bindparam(None, ids, type_=ARRAY(column.type)))
+
+
+# the found items keyed by id and the ids that were not found, without failing
+# the batch, items that were not asked for are left out so a whole cached
+# collection can be passed in
+def batch_result(ids: list[uuid.UUID], items: list[dict]):
+    wanted = {str(id) for id in ids}
+    found = {str(item["id"]): item for item in items if str(item["id"]) in wanted}
+    return {"items": found, "missing": [id for id in ids if str(id) not in found]}
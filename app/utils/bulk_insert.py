@@ -0,0 +1,16 @@
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# most bind parameters asyncpg accepts in a single statement
+MAX_BIND_PARAMETERS = 32767
+
+
+# insert the rows with multi-row INSERT ... VALUES statements, passing the rows
+# apart would make asyncpg run an executemany of one INSERT per row, each
+# statement gets as many rows as the bind parameter limit allows, counting
+# every column of the table so the python side defaults are included
+async def insert_rows(db: AsyncSession, schema, rows: list[dict]):
+    rows_per_statement = MAX_BIND_PARAMETERS // len(schema.__table__.columns)
+
+    for start in range(0, len(rows), rows_per_statement):
+        await db.execute(insert(schema).values(rows[start:start + rows_per_statement]))
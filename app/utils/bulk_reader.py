@@ -0,0 +1,96 @@
+import csv
+import json
+from collections import deque
+from fastapi import Request, status, HTTPException
+
+
+# split the streamed request body into decoded lines without buffering it whole
+async def _iter_lines(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+# lines handed to a csv reader as they arrive, the reader is only advanced once
+# the lines it holds close every quote so it never runs out mid record
+class _LineFeed:
+    def __init__(self):
+        self.lines = deque()
+        self.quotes = 0
+
+    def add(self, line: str):
+        self.lines.append(line + "\n")
+        self.quotes += line.count('"')
+
+    # an even number of quotes means no quoted field is left open
+    def has_record(self):
+        return bool(self.lines) and self.quotes % 2 == 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+# read the rows of a bulk request sent as a JSON array, NDJSON or CSV
+async def read_bulk_rows(request: Request, max_rows: int):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    rows = []
+
+    try:
+        if content_type in ("application/x-ndjson", "application/ndjson"):
+            async for line in _iter_lines(request):
+                if line.strip():
+                    rows.append(json.loads(line))
+                    if len(rows) > max_rows:
+                        break
+
+        elif content_type == "text/csv":
+            # a single reader over the whole body so quoted fields may span lines
+            feed = _LineFeed()
+            reader = csv.reader(feed, strict=True)
+            header = None
+            async for line in _iter_lines(request):
+                # blank lines between records are skipped, inside a quoted field they are kept
+                if not feed.lines and not line.strip():
+                    continue
+                feed.add(line)
+                if not feed.has_record():
+                    continue
+                values = next(reader)
+                feed.quotes = 0
+                if header is None:
+                    header = values
+                    continue
+                # empty csv cells are missing values, not empty strings
+                rows.append({key: value or None for key, value in zip(header, values)})
+                if len(rows) > max_rows:
+                    break
+
+            if feed.lines:
+                raise ValueError("unterminated quoted field in the CSV body")
+
+        elif content_type == "application/json":
+            rows = await request.json()
+            if not isinstance(rows, list):
+                raise ValueError("expected a JSON array")
+
+        else:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail=f"Unsupported content type {content_type}")
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid request body: {e}")
+
+    if len(rows) > max_rows:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A bulk request can not have more than {max_rows} rows")
+
+    return rows
@@ -0,0 +1,96 @@
+import json
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from sqlalchemy import func, TIMESTAMP
+
+
+# strong validator for a JSON-able body
+def compute_etag(body):
+    payload = json.dumps(body, default=str, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # weak comparison, as required for If-None-Match
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+# answer 304 when the client already has this version of the body, otherwise
+# tag the response and hand the body back to the route
+def conditional_body(request: Request, response: Response, body, etag: str = None):
+    etag = etag or compute_etag(body)
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return body
+
+
+# last modification of a row, falling back to its creation for rows never updated
+def modified_at(schema):
+    return func.coalesce(schema.updated_at, schema.created_at)
+
+
+# most recent of several modification times, NULLs are ignored
+def latest(*modified):
+    return func.greatest(*modified, type_=TIMESTAMP(timezone=True))
+
+
+# weak validator of an entity from the last modification of the rows it is built
+# from, the other parts (e.g. the number of related rows) catch deletions
+def version_etag(last_modified: datetime, *parts):
+    payload = "|".join([last_modified.isoformat()] + [str(part) for part in parts])
+    return 'W/"' + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest() + '"'
+
+
+def _modified_since(request: Request, last_modified: datetime):
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return True
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return True
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    # HTTP dates only carry whole seconds
+    return last_modified.replace(microsecond=0) > since
+
+
+# answer 304 from the version of an entity before it is loaded, returns None
+# when the route has to build the full response, If-None-Match takes
+# precedence over If-Modified-Since as required by RFC 9110
+def conditional_version(request: Request, response: Response, last_modified: datetime, *parts):
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    etag = version_etag(last_modified, *parts)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+    }
+
+    if request.headers.get("if-none-match"):
+        not_modified = etag_matches(request, etag)
+    else:
+        not_modified = not _modified_since(request, last_modified)
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,52 @@
+import io
+import csv
+import json
+from fastapi.responses import StreamingResponse
+from app.database.database import SessionLocal, replica_router
+from app.database.replicas import use_replica
+
+# rows fetched from the server side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+media_types = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _encode_csv(rows, header=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows, columns):
+    return "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+
+
+# stream the rows of the statement through a server side cursor so memory stays
+# flat whatever the size of the export, the generator owns its session because
+# the request's session may be closed before the body is sent, exports read
+# from a replica when one is up
+async def _stream_rows(statement, fmt: str):
+    async with SessionLocal() as db:
+        use_replica(db, replica_router)
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            yield _encode_csv([], columns)
+
+        async for rows in result.partitions():
+            if fmt == "csv":
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(rows, columns)
+
+
+def export_response(statement, fmt: str, filename: str):
+    return StreamingResponse(_stream_rows(statement, fmt), media_type=media_types[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'})
@@ -0,0 +1,125 @@
+import time
+import uuid
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.schemas import Login_Session_Schema
+from app.config.configs import settings
+
+
+def _hash_secret(secret: str):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+# a refresh token is "<session id>.<secret>", only the hash of the secret is stored
+def _split_refresh_token(refresh_token: str):
+    session_id, _, secret = refresh_token.partition(".")
+    try:
+        return uuid.UUID(session_id), secret
+    except ValueError:
+        return None, None
+
+
+# session ids revoked within the lifetime of an access token, reloaded from the
+# database every reload_every seconds so revocations reach every worker
+class RevokedSessions:
+    def __init__(self, window: float, reload_every: float):
+        self.window = window
+        self.reload_every = reload_every
+        self._ids = set()
+        self._loaded_at = None
+
+    # revocations made by this worker apply at once
+    def add(self, session_ids):
+        self._ids.update(session_ids)
+
+    async def contains(self, db: AsyncSession, session_id: uuid.UUID):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_every:
+            self._loaded_at = time.monotonic()
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.window)
+            result = await db.execute(select(Login_Session_Schema.id).filter(Login_Session_Schema.revoked_at > cutoff))
+            self._ids = set(result.scalars().all())
+
+        return session_id in self._ids
+
+
+# open a session for a device, returns its id and first refresh token, the
+# caller commits
+async def create_session(db: AsyncSession, user_id: uuid.UUID, revoked_window: float):
+    now = datetime.now(timezone.utc)
+
+    # drop the user's finished sessions so the table only holds live ones, revoked
+    # sessions stay while their access tokens may still be presented
+    await db.execute(delete(Login_Session_Schema).filter(
+                        Login_Session_Schema.user_id == user_id,
+                        or_(Login_Session_Schema.expires_at < now,
+                            Login_Session_Schema.revoked_at < now - timedelta(seconds=revoked_window))))
+
+    secret = secrets.token_urlsafe(32)
+    session = Login_Session_Schema(user_id=user_id, token_hash=_hash_secret(secret),
+                                   expires_at=now + timedelta(hours=settings.refresh_token_expire_hours))
+    db.add(session)
+    await db.flush()
+
+    return session.id, f"{session.id}.{secret}"
+
+
+# swap the refresh token of a session for a new one in a single statement,
+# returns the session id, its user and the new refresh token or None when the
+# token is not valid, presenting the replaced token again after the reuse
+# interval revokes the session because it means the token was copied, any other
+# secret is only refused since the session id is readable in the access tokens,
+# the caller commits in both cases
+async def rotate_session(db: AsyncSession, refresh_token: str, revoked: RevokedSessions):
+    session_id, secret = _split_refresh_token(refresh_token)
+    if session_id is None:
+        return None
+
+    now = datetime.now(timezone.utc)
+    new_secret = secrets.token_urlsafe(32)
+    live = (Login_Session_Schema.id == session_id, Login_Session_Schema.revoked_at.is_(None),
+            Login_Session_Schema.expires_at > now)
+
+    result = await db.execute(update(Login_Session_Schema).filter(
+                        *live, Login_Session_Schema.token_hash == _hash_secret(secret)
+                        ).values(previous_token_hash=Login_Session_Schema.token_hash,
+                                 token_hash=_hash_secret(new_secret), updated_at=now
+                        ).returning(Login_Session_Schema.user_id))
+    user_id = result.scalar()
+
+    if user_id is None:
+        reused_after = now - timedelta(seconds=settings.refresh_token_reuse_interval)
+        result = await db.execute(update(Login_Session_Schema).filter(
+                            *live, Login_Session_Schema.previous_token_hash == _hash_secret(secret),
+                            Login_Session_Schema.updated_at < reused_after
+                            ).values(revoked_at=now).returning(Login_Session_Schema.id))
+        revoked.add(result.scalars().all())
+        return None
+
+    return session_id, user_id, f"{session_id}.{new_secret}"
+
+
+# revoke the session of a refresh token, the caller commits
+async def revoke_session(db: AsyncSession, refresh_token: str, revoked: RevokedSessions):
+    session_id, secret = _split_refresh_token(refresh_token)
+    if session_id is None:
+        return False
+
+    result = await db.execute(update(Login_Session_Schema).filter(
+                        Login_Session_Schema.id == session_id, Login_Session_Schema.revoked_at.is_(None),
+                        Login_Session_Schema.token_hash == _hash_secret(secret)
+                        ).values(revoked_at=datetime.now(timezone.utc)).returning(Login_Session_Schema.id))
+    session_ids = result.scalars().all()
+    revoked.add(session_ids)
+
+    return bool(session_ids)
+
+
+# revoke every session of a user, e.g. after a password change, the caller commits
+async def revoke_user_sessions(db: AsyncSession, user_id: uuid.UUID, revoked: RevokedSessions):
+    result = await db.execute(update(Login_Session_Schema).filter(
+                        Login_Session_Schema.user_id == user_id, Login_Session_Schema.revoked_at.is_(None)
+                        ).values(revoked_at=datetime.now(timezone.utc)).returning(Login_Session_Schema.id))
+    revoked.add(result.scalars().all())
@@ -0,0 +1,43 @@
+import json
+import uuid
+import base64
+import binascii
+from fastapi import status, HTTPException
+from sqlalchemy import tuple_
+from app.schemas.schemas import Person_Schema
+
+# response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# encode the sort key of the last row of a page into an opaque cursor
+def encode_cursor(lastname: str, person_id: uuid.UUID):
+    payload = json.dumps([lastname, str(person_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        lastname, person_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return lastname, uuid.UUID(person_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+# order a query joined to persons by (lastname, id) and start it after the
+# cursor, an empty cursor asks for the first page
+def keyset_paginate(query, cursor: str, limit: int):
+    if cursor:
+        lastname, person_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Person_Schema.lastname, Person_Schema.id) > tuple_(lastname, person_id))
+
+    return query.order_by(Person_Schema.lastname, Person_Schema.id).limit(limit)
+
+
+# the cursor of the page after the given rows, None when it was the last page,
+# id_key names the attribute holding the person id of a row
+def next_cursor(persons: list, limit: int, id_key: str = "id"):
+    if len(persons) < limit or not persons:
+        return None
+
+    return encode_cursor(persons[-1].lastname, getattr(persons[-1], id_key))
@@ -0,0 +1,176 @@
+import time
+import ipaddress
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Request
+from app.config.configs import settings
+from app.utils.jwt_token import password_pool, PasswordPool
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+# token buckets kept in this worker's memory, the least recently used buckets
+# are dropped past maxsize (a dropped bucket starts full again)
+class MemoryBuckets:
+    def __init__(self, capacity: int, per_minute: float, maxsize: int = 10000):
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    # take a token from the bucket of key, returns whether it was allowed and
+    # the seconds until the next token when it was not
+    async def take(self, key: str):
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+# token buckets shared by every worker through redis, updated atomically by a
+# script that uses the redis clock
+class RedisBuckets:
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local clock = redis.call("TIME")
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + (now - updated) * rate)
+        local allowed = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        end
+        redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+        redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate))
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str, capacity: int, per_minute: float):
+        if redis is None:
+            raise RuntimeError("The redis package is required to use a shared login rate limit")
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.prefix = prefix
+        self.capacity = capacity
+        self.rate = per_minute / 60
+
+    async def take(self, key: str):
+        try:
+            allowed, tokens = await self.script(keys=[f"{self.prefix}:{key}"], args=[self.capacity, self.rate])
+        except redis.RedisError:
+            # an unreachable redis does not lock everyone out
+            return True, 0.0
+
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / self.rate
+
+
+# the client ip of a request, read from X-Forwarded-For when the request comes
+# from a trusted proxy, the rightmost address that is not a trusted proxy is
+# taken since the client can put anything left of it
+class ClientIp:
+    def __init__(self, trusted_proxies: list[str]):
+        self.trusted = [ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies]
+
+    def is_trusted(self, address: str):
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted)
+
+    def __call__(self, request: Request):
+        host = request.client.host if request.client else "unknown"
+        forwarded = request.headers.get("x-forwarded-for")
+
+        if not forwarded or not self.is_trusted(host):
+            return host
+
+        for address in reversed(forwarded.split(",")):
+            address = address.strip()
+            if address and not self.is_trusted(address):
+                return address
+
+        return host
+
+
+# sheds login attempts before any password is verified, per client ip, per
+# account and when the password pool already has max_pending verifications, a
+# limit without buckets is off
+class LoginLimiter:
+    def __init__(self, ip_buckets, account_buckets, pool: PasswordPool, max_pending: int):
+        self.ip_buckets = ip_buckets
+        self.account_buckets = account_buckets
+        self.pool = pool
+        self.max_pending = max_pending or pool.max_concurrency * 4
+        self.accepted = 0
+        self.shed_ip = 0
+        self.shed_account = 0
+        self.shed_busy = 0
+
+    # None when the attempt may go on, otherwise the seconds the client should wait
+    async def check(self, ip: str, account: str) -> Optional[float]:
+        if self.pool.in_flight + self.pool.waiting >= self.max_pending:
+            self.shed_busy += 1
+            return 1.0
+
+        if self.ip_buckets is not None:
+            allowed, retry_after = await self.ip_buckets.take(ip)
+            if not allowed:
+                self.shed_ip += 1
+                return retry_after
+
+        if self.account_buckets is not None:
+            allowed, retry_after = await self.account_buckets.take(account.strip().lower())
+            if not allowed:
+                self.shed_account += 1
+                return retry_after
+
+        self.accepted += 1
+        return None
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "shed_ip": self.shed_ip,
+            "shed_account": self.shed_account,
+            "shed_busy": self.shed_busy,
+            "max_pending": self.max_pending,
+        }
+
+
+# None when the limit is off, buckets that never refill would make clients wait forever
+def create_buckets(url: Optional[str], prefix: str, capacity: int, per_minute: float):
+    if capacity <= 0 or per_minute <= 0:
+        return None
+    if url:
+        return RedisBuckets(url, prefix, capacity, per_minute)
+    return MemoryBuckets(capacity, per_minute)
+
+
+login_limiter = LoginLimiter(
+    create_buckets(settings.login_rate_limit_url, "login:ip", settings.login_ip_burst, settings.login_ip_per_minute),
+    create_buckets(settings.login_rate_limit_url, "login:account", settings.login_account_burst,
+                   settings.login_account_per_minute),
+    password_pool,
+    settings.login_max_pending,
+)
+
+client_ip = ClientIp(settings.login_trusted_proxies)
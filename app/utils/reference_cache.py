@@ -0,0 +1,110 @@
+import json
+from typing import Optional
+from app.config.configs import settings
+from app.utils.cache import TTLCache
+from app.utils.conditional import compute_etag
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+# keeps the entries in this worker's memory
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: int):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str):
+        return self.cache.get(key)
+
+    async def set(self, key: str, value):
+        self.cache.set(key, value)
+
+    async def delete(self, key: str):
+        self.cache.invalidate(key)
+
+    def size(self):
+        stats = self.cache.stats()
+        return stats["size"], stats["maxsize"]
+
+
+# shares the entries between workers through redis
+class RedisBackend:
+    def __init__(self, url: str, ttl: int):
+        if redis is None:
+            raise RuntimeError("The redis package is required to use a shared reference cache")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str):
+        value = await self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value):
+        await self.client.set(key, json.dumps(value, default=str), ex=self.ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    def size(self):
+        return None, None
+
+
+# whole lookup collections (levels, subjects, periods, rooms) with the ETag of
+# their body, the write routes invalidate them and the ttl bounds how long
+# another worker's in-memory copy can be stale
+class ReferenceCache:
+    def __init__(self, backend, prefix: str = "reference"):
+        self.backend = backend
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, name: str):
+        return f"{self.prefix}:{name}"
+
+    async def get_or_load(self, name: str, load):
+        entry = await self.backend.get(self._key(name))
+
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        items = await load()
+        entry = {"items": items, "etag": compute_etag(items)}
+        await self.backend.set(self._key(name), entry)
+        return entry
+
+    async def invalidate(self, name: str):
+        await self.backend.delete(self._key(name))
+
+    def stats(self):
+        size, maxsize = self.backend.size()
+        return {
+            "size": size,
+            "maxsize": maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def create_backend(url: Optional[str]):
+    if url:
+        return RedisBackend(url, settings.reference_cache_ttl)
+    return MemoryBackend(maxsize=64, ttl=settings.reference_cache_ttl)
+
+
+reference_cache = ReferenceCache(create_backend(settings.reference_cache_url))
+
+
+# filter a cached collection by a case insensitive name search, like the ilike
+# filters the routes used before
+def search_items(entry: dict, search: Optional[str]):
+    if not search:
+        return entry["items"], entry["etag"]
+
+    search = search.lower()
+    items = [item for item in entry["items"] if search in item["name"].lower()]
+    return items, compute_etag(items)
@@ -0,0 +1,26 @@
+import json
+from typing import Optional
+from fastapi.responses import JSONResponse
+
+# orjson is optional, the standard encoder is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(content)
+
+        return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# list response built straight from the selected rows, only the first
+# len(fields) columns of each row are sent so trailing columns can carry
+# e.g. the keyset of the page, a Response returned by a route is neither
+# validated against its response_model nor run through jsonable_encoder, so
+# the query must already select the shape of the response_model
+def rows_response(rows, fields: list[str], headers: Optional[dict] = None):
+    return FastJSONResponse([dict(zip(fields, row)) for row in rows], headers=headers)
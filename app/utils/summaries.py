@@ -0,0 +1,67 @@
+from collections import defaultdict
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.schemas import Grade_Summary_Schema, Attendance_Summary_Schema
+
+
+# the totals in key order, so concurrent upserts lock the summary rows they
+# share in the same order and can not deadlock each other
+def _in_key_order(totals: dict):
+    return sorted(totals.items(), key=lambda item: tuple(str(part) for part in item[0]))
+
+
+# add new homework or test grades to the running totals, this runs inside the
+# caller's transaction so the summaries commit or roll back with the grades
+async def add_grades_to_summary(db: AsyncSession, kind: str, grades: list[dict]):
+    totals = defaultdict(lambda: [0.0, 0])
+    for grade in grades:
+        key = (grade["student_id"], grade["subject_id"], grade["period_id"])
+        totals[key][0] += grade["average"]
+        totals[key][1] += 1
+
+    total_column = f"{kind}_total"
+    count_column = f"{kind}_count"
+
+    rows = [{
+        "student_id": student_id,
+        "subject_id": subject_id,
+        "period_id": period_id,
+        total_column: total,
+        count_column: count,
+    } for (student_id, subject_id, period_id), (total, count) in _in_key_order(totals)]
+
+    statement = insert(Grade_Summary_Schema).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["student_id", "subject_id", "period_id"],
+        set_={
+            total_column: getattr(Grade_Summary_Schema, total_column) + getattr(statement.excluded, total_column),
+            count_column: getattr(Grade_Summary_Schema, count_column) + getattr(statement.excluded, count_column),
+            "updated_at": func.now(),
+        },
+    ))
+
+
+# count new attendance rows in the summaries, inside the caller's transaction
+async def add_attendance_to_summary(db: AsyncSession, attendance: list[dict]):
+    totals = defaultdict(int)
+    for row in attendance:
+        totals[(row["student_id"], row["subject_id"], row["period_id"])] += 1
+
+    rows = [{
+        "student_id": student_id,
+        "subject_id": subject_id,
+        "period_id": period_id,
+        "attended": attended,
+        "last_attended_at": func.now(),
+    } for (student_id, subject_id, period_id), attended in _in_key_order(totals)]
+
+    statement = insert(Attendance_Summary_Schema).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=["student_id", "subject_id", "period_id"],
+        set_={
+            "attended": Attendance_Summary_Schema.attended + statement.excluded.attended,
+            "last_attended_at": statement.excluded.last_attended_at,
+            "updated_at": func.now(),
+        },
+    ))
@@ -0,0 +1,28 @@
+import re
+import uuid
+from app.middleware import oauth2
+from app.schemas.schemas import Institution_Schema, Person_Schema, User_Schema, Student_Schema, Academic_Degree_Schema
+
+
+# the number of SQL statements the request issued, from its Server-Timing header
+def query_count(response):
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+# an authorization header for a saved user
+def auth_headers(user: User_Schema):
+    return {"Authorization": f"Bearer {oauth2.create_access_token(data={'user_id': str(user.id)})}"}
+
+
+def new_person(institution: Institution_Schema, name: str):
+    return Person_Schema(firstname=name, lastname=f"{name}-{uuid.uuid4().hex[:8]}", institution=institution)
+
+
+def new_user(institution: Institution_Schema, name: str, **roles):
+    return User_Schema(email=f"{uuid.uuid4().hex}@school.test", password="not-a-hash",
+                       person=new_person(institution, name), **roles)
+
+
+def new_student(institution: Institution_Schema, level: Academic_Degree_Schema, creator: User_Schema):
+    return Student_Schema(identification=uuid.uuid4().hex, person=new_person(institution, "Student"),
+                          level=level, user=creator)
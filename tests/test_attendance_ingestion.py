@@ -0,0 +1,50 @@
+import time
+import uuid
+import asyncio
+from sqlalchemy import select, func
+from app.attendance.routes.attendance_routes import MAX_ROLL_CALL_STUDENTS
+from app.schemas.schemas import (Institution_Schema, Academic_Degree_Schema, Subject_Schema, Period_Schema,
+                                 Assistance_Schema)
+from factories import query_count, auth_headers, new_user, new_student
+
+
+def recorded_attendance(database, subject_id):
+    async def count():
+        async with database() as db:
+            result = await db.execute(select(func.count()).select_from(Assistance_Schema)
+                                      .filter(Assistance_Schema.subject_id == subject_id))
+            return result.scalar_one()
+
+    return asyncio.run(count())
+
+
+# a full roll call is saved with the same statements as a small one, one
+# multi-row insert for the attendance instead of an insert per student
+def test_roll_call_ingestion(client, database, add):
+    institution = Institution_Schema(name=f"School {uuid.uuid4().hex[:8]}")
+    level = Academic_Degree_Schema(name="First")
+    teacher = new_user(institution, "Teacher", is_teacher=True)
+    subject = Subject_Schema(name="Math", user=teacher)
+    period = Period_Schema(name="First", user=teacher)
+    students = [new_student(institution, level, teacher) for _ in range(MAX_ROLL_CALL_STUDENTS)]
+    add(subject, period, *students)
+
+    def roll_call(students):
+        return client.post("/api/v1/attendance/roll-call", headers=auth_headers(teacher), json={
+            "subject_id": str(subject.id),
+            "level_id": str(level.id),
+            "period_id": str(period.id),
+            "student_ids": [str(student.id) for student in students],
+        })
+
+    small = roll_call(students[:10])
+    start = time.perf_counter()
+    full = roll_call(students)
+    elapsed = time.perf_counter() - start
+    print(f"\n{MAX_ROLL_CALL_STUDENTS} students recorded in {elapsed * 1000:.1f} ms, "
+          f"{MAX_ROLL_CALL_STUDENTS / elapsed:.0f} rows/s")
+
+    assert small.status_code == full.status_code == 201
+    assert full.json()["recorded"] == MAX_ROLL_CALL_STUDENTS
+    assert recorded_attendance(database, subject.id) == MAX_ROLL_CALL_STUDENTS + 10
+    assert query_count(full) == query_count(small)
@@ -0,0 +1,31 @@
+import uuid
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.subjects.routes import subjects_routes
+from app.utils.reference_cache import reference_cache
+
+# subjects of the stubbed cache loader
+SUBJECTS = [{"id": uuid.uuid4(), "name": f"Subject {i}", "user_id": uuid.uuid4()} for i in range(5)]
+
+
+# the subjects cache loaded from SUBJECTS instead of the database
+@pytest.fixture
+def client(monkeypatch):
+    async def load_subjects(db):
+        return SUBJECTS
+
+    monkeypatch.setattr(subjects_routes, "load_subjects", load_subjects)
+    asyncio.run(reference_cache.invalidate("subjects"))
+    yield TestClient(app)
+    asyncio.run(reference_cache.invalidate("subjects"))
+
+
+def test_subjects_batch_only_returns_the_requested_ids(client):
+    unknown = uuid.uuid4()
+    response = client.get("/api/v1/subjects/batch", params={"ids": [str(SUBJECTS[1]["id"]), str(unknown)]})
+
+    assert response.status_code == 200
+    assert list(response.json()["items"]) == [str(SUBJECTS[1]["id"])]
+    assert response.json()["missing"] == [str(unknown)]
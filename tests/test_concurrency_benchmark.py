@@ -0,0 +1,64 @@
+import time
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import Session
+
+# server side time of every query
+QUERY_SECONDS = 0.02
+
+# requests in flight at once and in total
+CONCURRENCY = 50
+REQUESTS = 500
+
+
+# one query per request, first through a blocking session as the routes did
+# before the async engine, then through the async sessions of the app
+def benchmark_app(database, blocking_engine):
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking_query():
+        with Session(blocking_engine) as db:
+            db.execute(select(func.pg_sleep(QUERY_SECONDS)))
+
+    @app.get("/async")
+    async def async_query():
+        async with database() as db:
+            await db.execute(select(func.pg_sleep(QUERY_SECONDS)))
+
+    return app
+
+
+async def requests_per_second(app, path):
+    limit = asyncio.Semaphore(CONCURRENCY)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def request():
+            async with limit:
+                response = await client.get(path)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*[request() for _ in range(REQUESTS)])
+        return REQUESTS / (time.perf_counter() - start)
+
+
+def test_async_sessions_serve_more_requests_under_load(database):
+    async_engine = database.kw["bind"]
+    if async_engine.dialect.name != "postgresql":
+        pytest.skip("the concurrency benchmark needs postgres")
+    pytest.importorskip("psycopg2")
+
+    blocking_engine = create_engine(async_engine.url.set(drivername="postgresql+psycopg2"),
+                                    pool_size=CONCURRENCY)
+    app = benchmark_app(database, blocking_engine)
+
+    before = asyncio.run(requests_per_second(app, "/blocking"))
+    after = asyncio.run(requests_per_second(app, "/async"))
+    blocking_engine.dispose()
+    print(f"\n{CONCURRENCY} concurrent requests: blocking {before:.0f} req/s, async {after:.0f} req/s")
+
+    assert after > before
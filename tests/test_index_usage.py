@@ -0,0 +1,87 @@
+import uuid
+import asyncio
+import pytest
+from sqlalchemy import select, text, tuple_
+from app.schemas.schemas import (Person_Schema, Student_Schema, Teacher_Schema, Student_In_Section_Schema,
+                                 Assistance_Schema, Homework_Schema, Login_Session_Schema)
+from app.students.routes.students_routes import student_search_query, student_search_filter
+
+# plan nodes that read through an index
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+some_id = uuid.uuid4()
+
+
+# the hot queries of the routes and the index each one must be served by
+HOT_QUERIES = {
+    "institution roster page": (
+        select(Person_Schema.id).filter(Person_Schema.institution_id == some_id,
+                                        tuple_(Person_Schema.lastname, Person_Schema.id) > tuple_("M", some_id)
+                                ).order_by(Person_Schema.lastname, Person_Schema.id).limit(10),
+        "ix_persons_institution_lastname_id",
+    ),
+    "room roster": (
+        select(Student_In_Section_Schema.student_id).filter(Student_In_Section_Schema.section_id == some_id),
+        "ix_students_in_sections_section_student",
+    ),
+    "teachers of a student": (
+        select(Teacher_Schema.teacher_id).filter(Teacher_Schema.student_id == some_id),
+        "ix_teachers_student_teacher",
+    ),
+    "attendance of a student": (
+        select(Assistance_Schema.id).filter(Assistance_Schema.student_id == some_id,
+                                            Assistance_Schema.period_id == some_id
+                                    ).order_by(Assistance_Schema.created_at.desc()).limit(100),
+        "ix_assistance_student_period_subject_created",
+    ),
+    "students of a level": (
+        select(Student_Schema.id).filter(Student_Schema.level_id == some_id),
+        "ix_students_level_id",
+    ),
+    "homeworks of a student": (
+        select(Homework_Schema.id).filter(Homework_Schema.student_id == some_id),
+        "ix_homeworks_student_id",
+    ),
+    "login sessions of a user": (
+        select(Login_Session_Schema.id).filter(Login_Session_Schema.user_id == some_id),
+        "ix_login_sessions_user_id",
+    ),
+    "student search by first name": (student_search_query("ana", 10), "ix_persons_firstname_trgm"),
+    "student search by last name": (student_search_query("ana", 10), "ix_persons_lastname_trgm"),
+    "student search by identification": (student_search_query("ana", 10), "ix_students_identification_trgm"),
+    "student list search": (
+        select(Student_Schema.id).join(Person_Schema, Student_Schema.person_id == Person_Schema.id
+                                ).filter(student_search_filter("ana")),
+        "ix_persons_lastname_trgm",
+    ),
+}
+
+
+# the indexes read by the plan of a statement, sequential scans are turned off
+# so an empty table still shows whether an index can serve the query
+def scanned_indexes(database, statement):
+    async def explain():
+        async with database() as db:
+            if db.bind.dialect.name != "postgresql":
+                pytest.skip("query plans are only checked on postgres")
+
+            await db.execute(text("SET LOCAL enable_seqscan = off"))
+            sql = statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            return result.scalar()
+
+    indexes = set()
+    nodes = [asyncio.run(explain())[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] in INDEX_SCANS:
+            indexes.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+
+    return indexes
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES)
+def test_hot_query_uses_its_index(database, query):
+    statement, index = HOT_QUERIES[query]
+    assert index in scanned_indexes(database, statement)
@@ -0,0 +1,87 @@
+import time
+import uuid
+import asyncio
+import pytest
+from sqlalchemy import text
+from app.schemas.schemas import Institution_Schema, Academic_Degree_Schema
+from app.utils.pagination import encode_cursor, NEXT_CURSOR_HEADER
+from factories import auth_headers, new_user
+
+# students of the benchmark institution
+STUDENTS = 1_000_000
+
+PAGE_SIZE = 100
+
+# the page that is compared
+PAGE = 1000
+
+# requests timed per mode, the fastest one is kept
+RUNS = 3
+
+
+# persons and students made by the database itself, the orm would take far too long
+def seed_students(database, institution_id, level_id, user_id):
+    async def seed():
+        async with database() as db:
+            if db.bind.dialect.name != "postgresql":
+                pytest.skip("the pagination benchmark needs postgres")
+
+            params = {"institution_id": institution_id, "level_id": level_id, "user_id": user_id}
+            await db.execute(text("INSERT INTO persons (id, firstname, lastname, institution_id) "
+                                  "SELECT gen_random_uuid(), 'Bench', 'Student ' || md5(n::text), "
+                                  "CAST(:institution_id AS uuid) "
+                                  "FROM generate_series(1, CAST(:students AS integer)) AS n"),
+                             {**params, "students": STUDENTS})
+            await db.execute(text("INSERT INTO students (id, identification, person_id, level_id, user_id) "
+                                  "SELECT gen_random_uuid(), 'bench-' || id, id, "
+                                  "CAST(:level_id AS uuid), CAST(:user_id AS uuid) FROM persons "
+                                  "WHERE institution_id = :institution_id AND firstname = 'Bench'"), params)
+            await db.commit()
+
+            # the cursor of the page before the compared one
+            result = await db.execute(text("SELECT persons.lastname, persons.id FROM students "
+                                           "JOIN persons ON persons.id = students.person_id "
+                                           "WHERE persons.institution_id = :institution_id "
+                                           "ORDER BY persons.lastname, persons.id LIMIT 1 OFFSET :offset"),
+                                      {"institution_id": institution_id, "offset": (PAGE - 1) * PAGE_SIZE - 1})
+            lastname, person_id = result.one()
+
+        async with database() as db:
+            await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            await db.execute(text("ANALYZE persons"))
+            await db.execute(text("ANALYZE students"))
+
+        return encode_cursor(lastname, person_id)
+
+    return asyncio.run(seed())
+
+
+def fastest(request):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        response = request()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    assert response.status_code == 200
+    assert len(response.json()) == PAGE_SIZE
+    return best, response
+
+
+def test_deep_cursor_page_is_faster_than_offset(client, database, add):
+    institution = Institution_Schema(name=f"School {uuid.uuid4().hex[:8]}")
+    level = Academic_Degree_Schema(name="First")
+    admin = new_user(institution, "Admin", is_admin=True, is_superuser=True)
+    add(level, admin)
+    cursor = seed_students(database, institution.id, level.id, admin.id)
+
+    offset_time, _ = fastest(lambda: client.get("/api/v1/students/", headers=auth_headers(admin),
+                                                params={"limit": PAGE_SIZE, "skip": (PAGE - 1) * PAGE_SIZE}))
+    cursor_time, response = fastest(lambda: client.get("/api/v1/students/", headers=auth_headers(admin),
+                                                       params={"limit": PAGE_SIZE, "cursor": cursor}))
+    print(f"\npage {PAGE} of {STUDENTS} students: offset {offset_time * 1000:.1f} ms, "
+          f"cursor {cursor_time * 1000:.1f} ms")
+
+    assert NEXT_CURSOR_HEADER.lower() in response.headers
+    assert cursor_time < offset_time
@@ -0,0 +1,117 @@
+import time
+import uuid
+import pytest
+from app.schemas.schemas import (Institution_Schema, Teacher_Schema, Academic_Degree_Schema, Section_Schema,
+                                 Student_In_Section_Schema)
+from factories import query_count, auth_headers, new_user, new_student
+
+# number of related rows of the larger case
+MANY = 25
+
+
+@pytest.fixture
+def school():
+    institution = Institution_Schema(name=f"School {uuid.uuid4().hex[:8]}")
+    return institution, Academic_Degree_Schema(name="First"), new_user(institution, "Admin")
+
+
+# a student with the given number of teachers
+@pytest.fixture
+def student_with_teachers(add, school):
+    def create(teachers: int):
+        institution, level, creator = school
+        student = new_student(institution, level, creator)
+        add(student, *[Teacher_Schema(student=student, teacher=new_user(institution, "Teacher"))
+                       for _ in range(teachers)])
+        return student.id
+
+    return create
+
+
+# a room with the given number of students
+@pytest.fixture
+def room_with_students(add, school):
+    def create(students: int):
+        institution, level, creator = school
+        section = Section_Schema(name="Room")
+        add(section, *[Student_In_Section_Schema(section=section, student=new_student(institution, level, creator))
+                       for _ in range(students)])
+        return section.id
+
+    return create
+
+
+def test_student_profile_query_count_does_not_grow_with_teachers(client, student_with_teachers):
+    one = client.get(f"/api/v1/students/{student_with_teachers(1)}")
+    many = client.get(f"/api/v1/students/{student_with_teachers(MANY)}")
+
+    assert one.status_code == many.status_code == 200
+    assert len(many.json()["teachers"]) == MANY
+    assert query_count(many) == query_count(one)
+
+
+def test_room_query_count_does_not_grow_with_students(client, room_with_students):
+    one = client.get(f"/api/v1/rooms/{room_with_students(1)}")
+    many = client.get(f"/api/v1/rooms/{room_with_students(MANY)}")
+
+    assert one.status_code == many.status_code == 200
+    assert len(many.json()["students"]) == MANY
+    assert query_count(many) == query_count(one)
+
+
+def test_room_page_query_count_does_not_grow_with_students(client, room_with_students):
+    one = client.get(f"/api/v1/rooms/{room_with_students(1)}", params={"cursor": "", "limit": 10})
+    many = client.get(f"/api/v1/rooms/{room_with_students(MANY)}", params={"cursor": "", "limit": 10})
+
+    assert one.status_code == many.status_code == 200
+    assert len(many.json()["students"]) == 10
+    assert query_count(many) == query_count(one)
+
+
+# the existence check and one insert each for the person and the student or
+# user, the generated ids are sent with the inserts so nothing is read back
+CREATE_STATEMENTS = 3
+
+# creates timed after the first one, which also loads the principal
+CREATES = 10
+
+
+def test_student_create_issues_a_fixed_number_of_statements(client, add, school):
+    institution, level, _ = school
+    admin = new_user(institution, "Admin", is_admin=True, is_superuser=True)
+    add(level, admin)
+
+    def create():
+        return client.post("/api/v1/students/", headers=auth_headers(admin), json={
+            "identification": uuid.uuid4().hex,
+            "level_id": str(level.id),
+            "firstname": "Student",
+            "lastname": "Created",
+            "institution_id": str(institution.id),
+        })
+
+    assert create().status_code == 201
+
+    start = time.perf_counter()
+    responses = [create() for _ in range(CREATES)]
+    elapsed = time.perf_counter() - start
+    print(f"\nstudent create: {query_count(responses[-1])} statements, {elapsed / CREATES * 1000:.1f} ms")
+
+    assert all(response.status_code == 201 for response in responses)
+    assert all(query_count(response) == CREATE_STATEMENTS for response in responses)
+
+
+def test_user_create_issues_a_fixed_number_of_statements(client, add, school):
+    institution, _, _ = school
+    add(institution)
+
+    response = client.post("/api/v1/users/", json={
+        "email": f"{uuid.uuid4().hex}@school.edu",
+        "password": "a-password",
+        "firstname": "User",
+        "lastname": "Created",
+        "institution_id": str(institution.id),
+    })
+
+    assert response.status_code == 201
+    assert query_count(response) == CREATE_STATEMENTS
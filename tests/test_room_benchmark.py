@@ -0,0 +1,41 @@
+import time
+import uuid
+from app.schemas.schemas import Institution_Schema, Academic_Degree_Schema, Section_Schema, Student_In_Section_Schema
+from factories import query_count, new_user, new_student
+
+# members of the rooms that are compared
+ROOM_SIZES = (40, 400, 4000)
+
+# requests timed per room, the fastest one is kept
+RUNS = 5
+
+
+def test_room_roster_cost_per_member_does_not_grow(client, add):
+    institution = Institution_Schema(name=f"School {uuid.uuid4().hex[:8]}")
+    level = Academic_Degree_Schema(name="First")
+    creator = new_user(institution, "Admin")
+
+    timings = {}
+    for size in ROOM_SIZES:
+        section = Section_Schema(name=f"Room of {size}")
+        add(section, *[Student_In_Section_Schema(section=section, student=new_student(institution, level, creator))
+                       for _ in range(size)])
+
+        best = None
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            response = client.get(f"/api/v1/rooms/{section.id}")
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        assert response.status_code == 200
+        assert len(response.json()["students"]) == size
+        timings[size] = (best, query_count(response))
+
+    print("\n" + "\n".join(f"{size} members: {best * 1000:.1f} ms, {queries} queries"
+                           for size, (best, queries) in timings.items()))
+
+    # the same statements whatever the size, so the fixed cost of a request
+    # is shared by more members in the larger rooms
+    assert len({queries for _, queries in timings.values()}) == 1
+    assert timings[ROOM_SIZES[-1]][0] / ROOM_SIZES[-1] < timings[ROOM_SIZES[0]][0] / ROOM_SIZES[0]
@@ -0,0 +1,30 @@
+import time
+import uuid
+from fastapi import HTTPException
+from app.middleware import oauth2
+
+# distinct access tokens verified per pass
+TOKENS = 2000
+
+credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+def verify_all(tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        oauth2.verify_access_token(token, credentials_exception)
+    return time.perf_counter() - start
+
+
+def test_cached_tokens_verify_faster_than_cold_ones():
+    tokens = [oauth2.create_access_token(data={"user_id": str(uuid.uuid4()), "sid": str(uuid.uuid4())})
+              for _ in range(TOKENS)]
+    oauth2.token_cache.clear()
+
+    # the first pass decodes and checks every signature, the second hits the cache
+    cold_time = verify_all(tokens)
+    cached_time = verify_all(tokens)
+    print(f"\n{TOKENS} tokens: cold {cold_time * 1000:.1f} ms, cached {cached_time * 1000:.1f} ms")
+
+    assert oauth2.verify_access_token(tokens[0], credentials_exception).session_id is not None
+    assert cached_time < cold_time